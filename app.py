@@ -1,19 +1,17 @@
-import os
+import time
+
+script_started = time.perf_counter()
+
 import traceback
-import pandas as pd
 import streamlit as st
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
-from utils.mrr import generate_financial_reports
+from utils.jobs import runner
+from utils.load_sheet_id import get_sheet_ids, update_sheet_id
+from utils.startup import record_render
 
 load_dotenv()
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-
-supabase: Client = create_client(url, key)
-
 st.set_page_config(
     page_title="MRR Calculator",
     page_icon="📊",
@@ -26,32 +24,10 @@ st.caption("End-to-end MRR, ARR & MIS automation")
 
 st.divider()
 
-def fetch_sheet_id(table_name):
-    res = supabase.table(table_name).select("*").limit(1).execute()
-    if res.data:
-        return res.data[0]["sheet_id"]
-    return ""
-
-def update_sheet_id(table_name, new_sheet_id):
-    res = supabase.table(table_name).select("*").limit(1).execute()
-    if res.data:
-        row = res.data[0]
-        row_id = row.get("id")
-        if row_id is not None:
-            supabase.table(table_name).update(
-                {"sheet_id": new_sheet_id}
-            ).eq("id", row_id).execute()
-            return
-    supabase.table(table_name).insert(
-        {"sheet_id": new_sheet_id}
-    ).execute()
-
-invoice_sheet_id = fetch_sheet_id("coro_invoices_sheet")
-mis_sheet_id = fetch_sheet_id("coro_mis_sheet")
-master_sheet_id = fetch_sheet_id("coro_master_sheet")
+invoice_sheet_id, mis_sheet_id, master_sheet_id = get_sheet_ids()
 
 st.subheader("🔧 Google Sheet Configuration")
-st.caption("These Sheet IDs control where data is read from and written to")
+st.caption("These Sheet IDs control where data is read from and written to. Local snapshots work too: xlsx:path/to/book.xlsx or parquet:path/to/dir")
 
 with st.form("sheet_id_form"):
     col1, col2, col3 = st.columns(3)
@@ -106,13 +82,46 @@ with st.form("run_mrr_form"):
             use_container_width=True
         )
 
+record_render(script_started)
+
+STAGE_ICONS = {"start": "⏳", "done": "✅", "error": "❌"}
+
+def run_workflow(month, google_sheet_id, sheet_ids):
+    # Imported on first use so page loads on a cold machine do not pay
+    # for pandas, gspread and google-auth.
+    from utils.mrr import generate_financial_reports
+
+    return generate_financial_reports(
+        month,
+        google_sheet_id=google_sheet_id,
+        sheet_ids=sheet_ids
+    )
+
+@st.fragment(run_every=1)
+def show_job_progress(job):
+    with st.status("Running MRR calculations…", expanded=True):
+        for name, state in job.stages().items():
+            st.write(f"{STAGE_ICONS.get(state, '')} {name}")
+    if job.done():
+        st.rerun()
+
 if run:
+    sheet_ids = get_sheet_ids()
+    st.session_state["mrr_job"] = runner.submit(
+        (*sheet_ids, mis_input, month_input),
+        run_workflow,
+        month_input,
+        mis_input,
+        sheet_ids
+    )
+
+job = st.session_state.get("mrr_job")
+
+if job is not None and not job.done():
+    show_job_progress(job)
+elif job is not None:
     try:
-        with st.spinner("Running MRR calculations…"):
-            mis_sheets = generate_financial_reports(
-                month_input,
-                google_sheet_id=mis_input
-            )
+        mis_sheets = job.result()
 
         st.success(f"Workflow completed — {len(mis_sheets)} sheets generated & synced")
 
@@ -132,5 +141,8 @@ if run:
 
     except Exception:
         st.error("Workflow failed")
-        st.code(traceback.format_exc(), language="text")
+        st.code(job.traceback or traceback.format_exc(), language="text")
 
+    if job.metrics.rows:
+        with st.expander("Run metrics by stage"):
+            st.dataframe(job.metrics.rows, use_container_width=True)
@@ -0,0 +1,138 @@
+import json
+import time
+import threading
+
+from gspread.utils import a1_range_to_grid_range
+
+from utils.stages import record_call
+
+def _split_range(range_name):
+    title, _, a1 = range_name.rpartition("!") if "!" in range_name else (range_name, "", "")
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, a1
+
+def _trim(values):
+    # The API leaves out trailing blank cells and rows.
+    rows = [list(row) for row in values]
+    for row in rows:
+        while row and row[-1] in ("", None):
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+# In-process stand-in for the gspread HTTPClient calls the pipeline makes.
+class FakeHTTPClient:
+    def __init__(self, workbooks, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._books = {}
+        for sheet_id, tabs in workbooks.items():
+            book = {"version": 1, "next_id": 0, "tabs": {}}
+            for title, values in tabs.items():
+                self._add_tab(book, title, [list(row) for row in values])
+            self._books[sheet_id] = book
+
+    def _add_tab(self, book, title, values, rows=1000, cols=26):
+        book["tabs"][title] = {
+            "sheetId": book["next_id"],
+            "rowCount": max(rows, len(values)),
+            "columnCount": max([cols] + [len(row) for row in values]),
+            "values": values,
+        }
+        book["next_id"] += 1
+
+    def _call(self, request, respond):
+        # Responses go through JSON like the real client's, which gives the
+        # byte counts and keeps callers from sharing the stored grids.
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            payload = json.dumps(respond())
+        record_call("sheets", sent=len(json.dumps(request)), received=len(payload))
+        return json.loads(payload)
+
+    def fetch_sheet_metadata(self, id, params=None):
+        def respond():
+            return {"sheets": [
+                {"properties": {
+                    "sheetId": tab["sheetId"],
+                    "title": title,
+                    "gridProperties": {"rowCount": tab["rowCount"], "columnCount": tab["columnCount"]},
+                }}
+                for title, tab in self._books[id]["tabs"].items()
+            ]}
+        return self._call(params, respond)
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        sheet_id = endpoint.rstrip("/").rsplit("/", 1)[-1]
+        return _Response(self._call(params, lambda: {"version": str(self._books[sheet_id]["version"])}))
+
+    def values_batch_get(self, id, ranges, params=None):
+        def respond():
+            value_ranges = []
+            for range_name in ranges:
+                title, _ = _split_range(range_name)
+                values = _trim(self._books[id]["tabs"][title]["values"])
+                entry = {"range": range_name, "majorDimension": "ROWS"}
+                if values:
+                    entry["values"] = values
+                value_ranges.append(entry)
+            return {"spreadsheetId": id, "valueRanges": value_ranges}
+        return self._call(ranges, respond)
+
+    def batch_update(self, id, body):
+        def respond():
+            book = self._books[id]
+            by_id = {tab["sheetId"]: title for title, tab in book["tabs"].items()}
+            for request in body.get("requests", []):
+                if "addSheet" in request:
+                    props = request["addSheet"]["properties"]
+                    grid = props.get("gridProperties", {})
+                    self._add_tab(book, props["title"], [], grid.get("rowCount", 1000), grid.get("columnCount", 26))
+                elif "updateSheetProperties" in request:
+                    props = request["updateSheetProperties"]["properties"]
+                    tab = book["tabs"][by_id[props["sheetId"]]]
+                    tab["rowCount"] = props["gridProperties"]["rowCount"]
+                    tab["columnCount"] = props["gridProperties"]["columnCount"]
+                elif "deleteSheet" in request:
+                    del book["tabs"][by_id[request["deleteSheet"]["sheetId"]]]
+            book["version"] += 1
+            return {"spreadsheetId": id, "replies": [{} for _ in body.get("requests", [])]}
+        return self._call(body, respond)
+
+    def values_batch_update(self, id, body):
+        def respond():
+            book = self._books[id]
+            for data in body.get("data", []):
+                title, a1 = _split_range(data["range"])
+                grid = a1_range_to_grid_range(a1) if a1 else {}
+                r0, c0 = grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0)
+                values = book["tabs"][title]["values"]
+                for r, row in enumerate(data["values"], r0):
+                    while len(values) <= r:
+                        values.append([])
+                    target = values[r]
+                    if len(target) < c0 + len(row):
+                        target.extend([""] * (c0 + len(row) - len(target)))
+                    target[c0:c0 + len(row)] = row
+            book["version"] += 1
+            return {"spreadsheetId": id, "totalUpdatedRanges": len(body.get("data", []))}
+        return self._call(body, respond)
+
+    def tab_values(self, sheet_id, title):
+        with self._lock:
+            return _trim(self._books[sheet_id]["tabs"][title]["values"])
+
+class FakeClient:
+    def __init__(self, workbooks, latency=0.0):
+        self.http_client = FakeHTTPClient(workbooks, latency)
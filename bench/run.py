@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+# Keep benchmark snapshots and invoice indexes away from the app's cache.
+os.environ.setdefault("MRR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mrr-bench-cache"))
+
+from bench.fake_sheets import FakeClient
+from bench.workbooks import generate_workbooks, parse_scale
+from utils.google_client import use_client
+from utils.metrics import RunMetrics
+from utils.mrr import generate_financial_reports
+from utils.sheet_cache import CACHE_DIR
+from utils.stages import observe_stages
+
+SHEET_IDS = {"invoice": "bench-invoice", "mis": "bench-mis", "master": "bench-master"}
+
+def run_once(workbooks, month, latency=0.0, sync=True, cold=True):
+    if cold:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    # A fresh stand-in per run, so every run starts from the same workbooks
+    # rather than the previous run's synced output.
+    client = FakeClient(
+        {SHEET_IDS[name]: tabs for name, tabs in workbooks.items()},
+        latency=latency
+    )
+    use_client(client)
+
+    metrics = RunMetrics()
+    started = time.perf_counter()
+    with observe_stages(metrics.record_stage):
+        generate_financial_reports(
+            month,
+            google_sheet_id=SHEET_IDS["mis"] if sync else None,
+            sheet_ids=(SHEET_IDS["invoice"], SHEET_IDS["mis"], SHEET_IDS["master"])
+        )
+    return {
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        "sheets_calls": client.http_client.calls,
+        "stages": metrics.rows
+    }
+
+def summarize(runs):
+    # Stages run in the same order every time, so rows line up by position.
+    summary = []
+    for rows in zip(*(run["stages"] for run in runs)):
+        summary.append({
+            "stage": rows[0]["stage"],
+            "wall_ms": statistics.median(row["wall_ms"] for row in rows),
+            "cpu_ms": statistics.median(row["cpu_ms"] for row in rows),
+            "peak_rss_mb": max(row["peak_rss_mb"] for row in rows),
+            "rows_out": rows[0]["rows_out"],
+            "sheets_calls": rows[0]["sheets_calls"]
+        })
+    return summary
+
+def print_summary(scale, contracts, runs, summary):
+    total = statistics.median(run["wall_ms"] for run in runs)
+    print(f"\n{scale} ({contracts} contracts): {total:.1f} ms median end to end over {len(runs)} run(s)")
+    print(f"{'stage':<28}{'wall ms':>10}{'cpu ms':>10}{'peak MB':>10}{'rows out':>10}{'calls':>7}")
+    for row in summary:
+        print(
+            f"{row['stage']:<28}{row['wall_ms']:>10.1f}{row['cpu_ms']:>10.1f}"
+            f"{row['peak_rss_mb']:>10.1f}{row['rows_out']:>10}{row['sheets_calls']:>7}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time generate_financial_reports on synthetic workbooks, offline.")
+    parser.add_argument("--scale", nargs="+", default=["1k", "10k", "100k"], help="contract counts: 1k, 10k, 100k or a number")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--month", default="Oct-25")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every Sheets call")
+    parser.add_argument("--no-sync", action="store_true", help="skip writing the reports back")
+    parser.add_argument("--warm", action="store_true", help="keep the snapshot cache between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write every run's metrics to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scale:
+        contracts = parse_scale(scale)
+
+        started = time.perf_counter()
+        workbooks = generate_workbooks(contracts, seed=args.seed)
+        print(f"\ngenerated {scale} workbooks in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        runs = [
+            run_once(
+                workbooks,
+                args.month,
+                latency=args.latency_ms / 1000,
+                sync=not args.no_sync,
+                cold=not args.warm or i == 0
+            )
+            for i in range(args.repeat)
+        ]
+        summary = summarize(runs)
+        print_summary(scale, contracts, runs, summary)
+        results.append({"scale": scale, "contracts": contracts, "summary": summary, "runs": runs})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "month": args.month,
+                "latency_ms": args.latency_ms,
+                "sync": not args.no_sync,
+                "warm": args.warm,
+                "results": results
+            }, f, indent=2, default=str)
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import random
+from datetime import date, timedelta
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+PAYMENT_CYCLES = [
+    "Monthly", "Monthly ", "Quarterly", "Half Yearly", "Yearly",
+    "One Time", "15-days", "10-days"
+]
+NATURES = ["B2B", "B2B", "B2B", "B2C", ""]
+PRIOR_MONTHS = ["Apr", "May", "Jun", "Jul", "Aug", "Sep"]
+NULL_CELLS = ["", "-", "CN", "#REF!"]
+
+ACCRUAL_COLUMNS = [
+    "Invoice", "Customer Name", "Start Date ", "End Date", "Payment Cycle ",
+    " Contract Amount ", "Months", "Contract period"
+] + [
+    col
+    for month in PRIOR_MONTHS
+    for col in (f"Days in {month}", f"{month} Sales in months", f"{month} Sales in days")
+]
+MASTER_COLUMNS = [
+    "S.No", "Customer Name", "Invoice", "Nature of service", "Start Date ",
+    "End Date", "Payment Cycle ", "Contract Amount"
+]
+
+def parse_scale(scale):
+    return SCALES[scale] if scale in SCALES else int(scale)
+
+def _invoice_number(i):
+    return f"INV-25-26-{i:06d}"
+
+def _invoice_text(rng, i):
+    # The hand-typed variants normalize_invoice_column has to cope with.
+    return rng.choice([
+        _invoice_number(i),
+        f"INV-{i}",
+        f"INV-25-26-{i:06d} ",
+        f"INV-25-26-{i:06d}, CN-{i % 97}",
+    ])
+
+def _date_text(rng, day):
+    if rng.random() < 0.01:
+        return rng.choice(NULL_CELLS)
+    return rng.choice([day.strftime("%d/%m/%Y"), day.strftime("%d-%m-%Y"), day.strftime("%d/%m/%y")])
+
+def _amount_text(rng):
+    if rng.random() < 0.01:
+        return rng.choice(NULL_CELLS)
+    amount = rng.randint(1_000, 2_500_000)
+    return rng.choice([f"{amount:,}", str(amount), f"{amount}.50"])
+
+def _contract(rng, i, customers):
+    start = date(2024, 4, 1) + timedelta(days=rng.randint(0, 700))
+    end = start + timedelta(days=rng.choice([14, 29, 89, 179, 364, 729]))
+    return {
+        "invoice": i,
+        "customer": rng.choice(customers),
+        "start": _date_text(rng, start),
+        "end": _date_text(rng, end),
+        "cycle": rng.choice(PAYMENT_CYCLES),
+        "amount": _amount_text(rng),
+    }
+
+def generate_workbooks(contracts, new_share=0.05, seed=0):
+    rng = random.Random(seed)
+
+    customers = [
+        f"Customer {i}" + (" B2C" if i % 11 == 0 else "")
+        for i in range(max(10, contracts // 4))
+    ]
+    new_contracts = max(1, int(contracts * new_share))
+    rows = [_contract(rng, i, customers) for i in range(contracts + new_contracts)]
+    attached = rows[:contracts]
+
+    accrual = [["FY 25-26 Accrual"] + [""] * (len(ACCRUAL_COLUMNS) - 1), [""] * len(ACCRUAL_COLUMNS), ACCRUAL_COLUMNS]
+    for row in attached:
+        accrual.append([
+            _invoice_text(rng, row["invoice"]), row["customer"], row["start"], row["end"],
+            row["cycle"], row["amount"], rng.choice(PRIOR_MONTHS), rng.choice(["", "365", "30"])
+        ] + [str(rng.randint(0, 31)) if k % 3 == 0 else f"{rng.randint(0, 90_000):,}" for k in range(len(PRIOR_MONTHS) * 3)])
+
+    master = [["Master Contracts"] + [""] * (len(MASTER_COLUMNS) - 1), [""] * len(MASTER_COLUMNS), MASTER_COLUMNS]
+    for n, row in enumerate(rows, 1):
+        master.append([
+            str(n), row["customer"], _invoice_text(rng, row["invoice"]), "Subscription",
+            row["start"], row["end"], row["cycle"], row["amount"]
+        ])
+
+    invoice = [["Invoice Number", "Customer Name", "Invoice Date", "Amount"]]
+    for row in rows:
+        invoice.append([_invoice_number(row["invoice"]), row["customer"], row["start"], row["amount"]])
+
+    invoices = [["Invoices", "", ""], ["", "", ""], ["Invoice Number", "Customer Name", "Nature"]]
+    for row in rows:
+        invoices.append([_invoice_number(row["invoice"]), row["customer"], rng.choice(NATURES)])
+
+    active = [["Sep-25"]] + [[c] for c in rng.sample(customers, len(customers) // 2)]
+
+    def movements(title):
+        return [[title, "", ""], ["", "", ""], ["", "", ""], ["", "Aug-25", "Sep-25"]] + [
+            ["", rng.choice(customers), rng.choice(customers)] for _ in range(max(3, len(customers) // 50))
+        ]
+
+    months = [f"{m}-25" for m in PRIOR_MONTHS]
+    churn = [["Customer churnout"] + [""] * len(months)] + [[""] * (len(months) + 1) for _ in range(3)]
+    churn.append(["Particulars"] + months)
+    for label in ["Beginning", "Addition", "Less", "Ending"]:
+        churn.append([label] + [str(rng.randint(0, len(customers))) for _ in months])
+
+    return {
+        "invoice": {"Invoice (2)": invoice},
+        "mis": {
+            "FY 25-26-Accrual": accrual,
+            "Invoices": invoices,
+            "Active Subscriber": active,
+            "Addition": movements("Additions"),
+            "Deletions": movements("Deletions"),
+            "Customer churnout": churn,
+        },
+        "master": {"FY 25-26": master},
+    }
@@ -0,0 +1,112 @@
+import sys
+import time
+import logging
+import argparse
+import traceback
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Runs generate_financial_reports without Streamlit, e.g. from cron:
+#   python cli.py Oct-25
+#   python cli.py Apr-25:Oct-25
+#   python cli.py Apr-25:Oct-25 --output exports/mis.xlsx
+#   python cli.py Oct-25 --no-sync
+# Every run prints one JSON line of stage timings to stdout (and appends it
+# to the metrics file); logs go to stderr.
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value.strip(), "%b-%y")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a month like Oct-25")
+
+def parse_months(value):
+    first, _, last = value.partition(":")
+    first = parse_month(first)
+    last = parse_month(last) if last else first
+    if last < first:
+        raise argparse.ArgumentTypeError(f"{value!r} ends before it starts")
+    start = first.year * 12 + first.month - 1
+    end = last.year * 12 + last.month - 1
+    return [datetime(i // 12, i % 12 + 1, 1).strftime("%b-%y") for i in range(start, end + 1)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the MRR reports for a month or a range of months.")
+    parser.add_argument("months", type=parse_months, help="a month like Oct-25, or a range like Apr-25:Oct-25")
+    parser.add_argument("--sheet-ids", nargs=3, metavar=("INVOICE", "MIS", "MASTER"), help="workbooks to read; defaults to the saved configuration")
+    sync = parser.add_mutually_exclusive_group()
+    sync.add_argument("--no-sync", action="store_true", help="compute the reports without writing them anywhere")
+    sync.add_argument("--output", help="copy the MIS workbook here and run on the copy, leaving the MIS untouched, e.g. exports/mis.xlsx or parquet:exports/mis")
+    parser.add_argument("--keep-going", action="store_true", help="run the remaining months after one fails")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        stream=sys.stderr,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    # Each month's churn builds on the one before it, which is only on a
+    # workbook the run writes to.
+    if args.no_sync and len(args.months) > 1:
+        parser.error("a range of months needs its results synced; use --output for a local copy")
+
+    from utils.metrics import RunMetrics
+    from utils.mrr import generate_financial_reports, seed_workbook
+    from utils.stages import observe_stages
+
+    if args.sheet_ids:
+        sheet_ids = tuple(args.sheet_ids)
+    else:
+        from utils.load_sheet_id import get_sheet_ids
+
+        sheet_ids = get_sheet_ids()
+
+    read_ids = sheet_ids
+    if args.no_sync:
+        target = None
+    else:
+        target = args.output or sheet_ids[1]
+
+    if target and target != sheet_ids[1]:
+        try:
+            seed_workbook(sheet_ids[1], target)
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+            return 1
+        read_ids = (sheet_ids[0], target, sheet_ids[2])
+
+    failed = 0
+    for month in args.months:
+        metrics = RunMetrics()
+        submitted_at = time.time()
+        started = time.perf_counter()
+        status, error = "error", None
+        with observe_stages(metrics.record_stage):
+            try:
+                generate_financial_reports(month, google_sheet_id=target, sheet_ids=read_ids)
+                status = "done"
+            except Exception:
+                error = traceback.format_exc()
+                sys.stderr.write(error)
+        metrics.write(
+            key=[*sheet_ids, month],
+            status=status,
+            submitted_at=submitted_at,
+            wall_ms=round((time.perf_counter() - started) * 1000, 1),
+            output=target,
+            error=error
+        )
+        if status != "done":
+            failed += 1
+            if not args.keep_going:
+                break
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import os
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.sheet_cache import CACHE_DIR, replace_file
+
+ACTIVITY_DIR = os.path.join(CACHE_DIR, "activity")
+
+Movements = namedtuple("Movements", ["previous", "beginning", "additions", "deletions", "ending"])
+
+def month_key(month):
+    try:
+        return datetime.strptime(str(month).strip(), "%b-%y")
+    except ValueError:
+        return None
+
+def _order(month):
+    # Headers that are not Mon-YY sort after every real month.
+    return month_key(month) or datetime.max
+
+def customer_keys(names):
+    # One ID per customer however the name was spaced or cased on the sheet.
+    keys = (
+        pd.Series(names, dtype=object)
+        .dropna()
+        .astype(str)
+        .str.strip()
+        .str.replace(r"\s+", " ", regex=True)
+    )
+    keys = keys[(keys != "") & (keys.str.lower() != "nan")]
+    return keys.str.casefold(), keys
+
+def column_digest(names):
+    # The month's cells as they read on the sheet, blanks dropped; the column
+    # churnout writes reads back the same. One vectorized hash, as the
+    # invoice index does, so checking a store costs far less than rebuilding it.
+    cells = pd.Series(names, dtype=object)
+    cells = cells[cells.notna() & (cells != "")].astype(str)
+    hashed = pd.util.hash_pandas_object(cells, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+class ActivityStore:
+    # Customers x months of activity flags; row i is customer keys[i].
+    # digests[month] fingerprints the sheet column each month came from.
+    def __init__(self, keys=(), names=(), months=(), bits=None, digests=None):
+        self.keys = list(keys)
+        self.names = list(names)
+        self.months = list(months)
+        self.digests = dict(digests or {})
+        self.ids = {key: i for i, key in enumerate(self.keys)}
+        self.bits = bits if bits is not None else np.zeros((len(self.keys), len(self.months)), dtype=bool)
+
+    @classmethod
+    def from_sheet(cls, active_df):
+        store = cls()
+        for month in active_df.columns:
+            if month_key(month) is not None:
+                store.set_month(str(month).strip(), active_df[month])
+        return store
+
+    def customer_ids(self, names):
+        keys, display = customer_keys(names)
+        for key, name in zip(keys.tolist(), display.tolist()):
+            if key not in self.ids:
+                self.ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.names.append(name)
+        if len(self.keys) > self.bits.shape[0]:
+            grown = np.zeros((len(self.keys), len(self.months)), dtype=bool)
+            grown[:self.bits.shape[0]] = self.bits
+            self.bits = grown
+        return np.unique(np.fromiter((self.ids[key] for key in keys.tolist()), dtype=np.int64, count=len(keys)))
+
+    def set_month(self, month, names):
+        ids = self.customer_ids(names)
+        if month not in self.months:
+            position = sum(_order(m) <= _order(month) for m in self.months)
+            self.months.insert(position, month)
+            self.bits = np.insert(self.bits, position, False, axis=1)
+        column = self.months.index(month)
+        self.bits[:, column] = False
+        self.bits[ids, column] = True
+        self.digests[month] = column_digest(names)
+
+    def active(self, month):
+        if month not in self.months:
+            return np.zeros(len(self.keys), dtype=bool)
+        return self.bits[:, self.months.index(month)]
+
+    def count(self, month):
+        return int(self.active(month).sum())
+
+    def previous_month(self, month):
+        earlier = [m for m in self.months if m != month and _order(m) <= _order(month)]
+        return earlier[-1] if earlier else None
+
+    def movements(self, month):
+        previous = self.previous_month(month)
+        before = self.active(previous) if previous else np.zeros(len(self.keys), dtype=bool)
+        now = self.active(month)
+        names = np.array(self.names, dtype=object)
+        return Movements(
+            previous,
+            int(before.sum()),
+            names[now & ~before].tolist(),
+            names[before & ~now].tolist(),
+            int(now.sum())
+        )
+
+    def retention(self):
+        # Cohort = customers first active in a month after a gap (or ever).
+        # Entry [c, m] is the share of cohort c still active in month m.
+        bits = self.bits.astype(np.int64)
+        joined = self.bits & ~np.pad(self.bits, ((0, 0), (1, 0)))[:, :-1]
+        overlap = joined.T.astype(np.int64) @ bits
+        size = np.diag(overlap).astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.triu(overlap / size[:, None])
+        return pd.DataFrame(share, index=self.months, columns=self.months)
+
+    def matches(self, active_df):
+        # The sheet stays the record. The store is trusted only if it holds
+        # exactly the sheet's months and every month column is unchanged,
+        # which is checked by digest rather than by re-deriving the keys; a
+        # month left over from a failed sync, or any edited column, rebuilds it.
+        columns = {
+            str(month).strip(): active_df[month]
+            for month in active_df.columns
+            if month_key(month) is not None
+        }
+        if set(columns) != set(self.months):
+            return False
+        return all(self.digests.get(month) == column_digest(column) for month, column in columns.items())
+
+def _store_path(sheet_id):
+    return os.path.join(ACTIVITY_DIR, hashlib.sha1(sheet_id.encode("utf-8")).hexdigest() + ".npz")
+
+def load_activity(sheet_id, active_df):
+    store = None
+    if sheet_id:
+        try:
+            with np.load(_store_path(sheet_id), allow_pickle=False) as data:
+                months = data["months"].tolist()
+                store = ActivityStore(
+                    data["keys"].tolist(),
+                    data["names"].tolist(),
+                    months,
+                    np.unpackbits(data["bits"], axis=1, count=len(months)).astype(bool),
+                    dict(zip(months, data["digests"].tolist()))
+                )
+        except (OSError, ValueError, KeyError):
+            store = None
+    if store is None or not store.matches(active_df):
+        store = ActivityStore.from_sheet(active_df)
+    return store
+
+def save_activity(sheet_id, store):
+    if not sheet_id:
+        return
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                keys=np.array(store.keys, dtype=str),
+                names=np.array(store.names, dtype=str),
+                months=np.array(store.months, dtype=str),
+                bits=np.packbits(store.bits, axis=1),
+                digests=np.array([store.digests[m] for m in store.months], dtype=str)
+            )
+
+    replace_file(_store_path(sheet_id), write)
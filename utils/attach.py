@@ -2,33 +2,37 @@ import pandas as pd
 import numpy as np
 
 from utils.extract_data import extract_data
+from utils.frames import compact_frame
+from utils.get_sheet import declare_sheets
+from utils.invoice_index import attached_invoices
 from utils.normalize import normalize_invoice_column
+from utils.stages import stage
+
+declare_sheets("mis", "FY 25-26-Accrual")
 
 def normalize_mis_invoices(df):
     df = normalize_invoice_column(df, col_name="Invoice", default_year="25-26")
     return df
 
-def attach(month):
-    matched_df, mis_sheets = extract_data()
+@stage("attach")
+def attach(month, sheet_ids=None, sync_target=None):
+    matched_df, tables, mis_sheets = extract_data(sheet_ids)
 
     original_sheet = mis_sheets["FY 25-26-Accrual"]
 
-    header_rows = original_sheet.iloc[:2].copy()
-
-    df = original_sheet.iloc[2:].copy()
-    df.columns = original_sheet.iloc[1].values
-    df = df.reset_index(drop=True)
+    header_rows = original_sheet.iloc[:2]
 
-    df = normalize_mis_invoices(df)
-    target_df = df
+    accrual = tables["FY 25-26-Accrual"]
+    text_df = normalize_mis_invoices(accrual.text)
+    target_df = accrual.typed.assign(Invoice=text_df["Invoice"])
 
-    existing_invoices = set(
-        target_df["Invoice"]
-        .dropna()
-        .astype(str)
-        .str.split(",")
-        .explode()
-        .str.strip()
+    # The index is only saved when this run writes back to the workbook it
+    # read; dry runs and runs synced elsewhere leave its state alone.
+    sheet_id = original_sheet.attrs.get("spreadsheet_id")
+    existing_invoices = attached_invoices(
+        sheet_id,
+        text_df["Invoice"],
+        save=sheet_id == sync_target
     )
 
     new_rows_source = matched_df[
@@ -36,7 +40,7 @@ def attach(month):
         .astype(str)
         .str.strip()
         .isin(existing_invoices)
-    ].copy()
+    ]
 
     column_mapping = {
         "Invoice Number": "Invoice",
@@ -47,14 +51,26 @@ def attach(month):
         "Contract Amount": " Contract Amount "
     }
 
+    # The sheet gets the master's own text for the new rows; the working
+    # frame gets the parsed values of the same rows.
+    master_text = tables["FY 25-26"].text
+    text_source = new_rows_source[["Invoice Number", "Customer Name"]].join(
+        master_text[list(column_mapping)[2:]]
+    )
+
     data_to_append = new_rows_source[list(column_mapping.keys())].rename(
         columns=column_mapping
     )
+    text_to_append = text_source[list(column_mapping.keys())].rename(
+        columns=column_mapping
+    )
 
     if not data_to_append.empty:
         data_to_append["Months"] = month
+        text_to_append["Months"] = month
 
     final_df = pd.concat([target_df, data_to_append], ignore_index=True)
+    final_text = pd.concat([text_df, text_to_append], ignore_index=True)
 
     month_name = month.split("-")[0] if "-" in month else month
 
@@ -62,36 +78,37 @@ def attach(month):
     col_sales_months = f"{month_name} Sales in months"
     col_sales_days = f"{month_name} Sales in days"
 
-    final_df[col_days] = ""
-    final_df[col_sales_months] = ""
-    final_df[col_sales_days] = ""
+    calculated_period = (final_df["End Date"] - final_df["Start Date "]).dt.days + 1
+    contract_period = final_text["Contract period"].fillna(calculated_period)
 
-    start = pd.to_datetime(final_df["Start Date "], dayfirst=True, errors="coerce")
-    end = pd.to_datetime(final_df["End Date"], dayfirst=True, errors="coerce")
+    for frame in (final_df, final_text):
+        frame[col_days] = ""
+        frame[col_sales_months] = ""
+        frame[col_sales_days] = ""
+        frame["Contract period"] = contract_period
 
-    calculated_period = (end - start).dt.days + 1
-    final_df["Contract period"] = final_df["Contract period"].fillna(calculated_period)
-
-    new_column_names = final_df.columns.tolist()
+    new_column_names = final_text.columns.tolist()
 
     reconstructed_header = pd.DataFrame(
         np.nan,
         index=header_rows.index,
-        columns=range(len(new_column_names))
+        columns=range(len(new_column_names)),
+        dtype=object
     )
 
     orig_width = header_rows.shape[1]
     reconstructed_header.iloc[:, :orig_width] = header_rows.values
     reconstructed_header.iloc[1] = new_column_names
 
-    final_df_for_sheet = final_df.copy()
-    final_df_for_sheet.columns = range(len(new_column_names))
+    final_text_for_sheet = final_text.set_axis(range(len(new_column_names)), axis=1)
 
     full_sheet_df = pd.concat(
-        [reconstructed_header, final_df_for_sheet],
+        [reconstructed_header, final_text_for_sheet],
         ignore_index=True
     )
 
     mis_sheets["FY 25-26-Accrual"] = full_sheet_df
 
-    return final_df, mis_sheets
\ No newline at end of file
+    final_df = compact_frame(final_df)
+
+    return final_df, mis_sheets
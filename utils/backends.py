@@ -0,0 +1,273 @@
+import os
+import json
+from datetime import date, datetime
+from urllib.parse import quote, unquote
+
+from gspread.exceptions import APIError
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import absolute_range_name
+
+from utils import sheet_cache
+from utils.google_client import get_client
+from utils.sheet_diff import changed_ranges, read_values
+
+# A workbook is a dict of tab title -> rows of cell text, the shape the
+# Sheets values API returns. Backends read and write whole workbooks in
+# that shape, so everything above them is the same for every source.
+
+def _trim(values):
+    # Sheets leaves out trailing blank cells and rows; local files match it.
+    rows = [list(row) for row in values]
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+class GoogleSheetsBackend:
+    def __init__(self, sheet_id):
+        self.sheet_id = sheet_id
+
+    def titles(self):
+        metadata = get_client().http_client.fetch_sheet_metadata(
+            self.sheet_id,
+            params={"includeGridData": "false", "fields": "sheets.properties.title"}
+        )
+        return [s["properties"]["title"] for s in metadata.get("sheets", [])]
+
+    def revision(self):
+        try:
+            response = get_client().http_client.request(
+                "get",
+                f"{DRIVE_FILES_API_V3_URL}/{self.sheet_id}",
+                params={"fields": "version", "supportsAllDrives": "true"}
+            )
+            return response.json().get("version")
+        except APIError:
+            return None
+
+    def read(self, wanted=None):
+        revision = self.revision()
+
+        titles = sheet_cache.load_titles(self.sheet_id, revision) if revision else None
+        if titles is None:
+            titles = self.titles()
+            if revision:
+                sheet_cache.save_titles(self.sheet_id, revision, titles)
+
+        if wanted is not None:
+            titles = [title for title in titles if title in wanted]
+        if not titles:
+            return {}
+
+        values_by_title = {}
+        if revision:
+            for title in titles:
+                values = sheet_cache.load_values(self.sheet_id, title, revision)
+                if values is not None:
+                    values_by_title[title] = values
+
+        missing = [title for title in titles if title not in values_by_title]
+        if missing:
+            response = get_client().http_client.values_batch_get(
+                self.sheet_id,
+                [absolute_range_name(title) for title in missing]
+            )
+            for title, value_range in zip(missing, response.get("valueRanges", [])):
+                values = value_range.get("values", [])
+                values_by_title[title] = values
+                if revision:
+                    sheet_cache.save_values(self.sheet_id, title, revision, values)
+            if revision:
+                sheet_cache.evict()
+
+        return {title: values_by_title[title] for title in titles}
+
+    def write(self, sheets, keep_worksheet=None, drop_worksheets=()):
+        http_client = get_client().http_client
+
+        metadata = http_client.fetch_sheet_metadata(
+            self.sheet_id,
+            params={"fields": "sheets.properties(sheetId,title,gridProperties)"}
+        )
+        existing = {
+            sheet["properties"]["title"]: sheet["properties"]
+            for sheet in metadata.get("sheets", [])
+        }
+
+        # Tabs are kept and resized in place; only retired tabs are removed,
+        # after any new tabs exist so the spreadsheet is never left empty.
+        requests = []
+        for title, values in sheets.items():
+            rows = max(len(values), 1)
+            cols = max(len(values[0]) if values else 0, 1)
+            if title not in existing:
+                requests.append({"addSheet": {"properties": {
+                    "title": title,
+                    "gridProperties": {"rowCount": rows, "columnCount": cols}
+                }}})
+                continue
+            grid = existing[title].get("gridProperties", {})
+            if rows > grid.get("rowCount", 0) or cols > grid.get("columnCount", 0):
+                requests.append({"updateSheetProperties": {
+                    "properties": {
+                        "sheetId": existing[title]["sheetId"],
+                        "gridProperties": {
+                            "rowCount": max(rows, grid.get("rowCount", 0)),
+                            "columnCount": max(cols, grid.get("columnCount", 0))
+                        }
+                    },
+                    "fields": "gridProperties(rowCount,columnCount)"
+                }})
+
+        for title in drop_worksheets:
+            if title in existing and title not in sheets and title != keep_worksheet:
+                requests.append({"deleteSheet": {"sheetId": existing[title]["sheetId"]}})
+
+        if requests:
+            http_client.batch_update(self.sheet_id, {"requests": requests})
+
+        current = read_values(
+            http_client,
+            self.sheet_id,
+            [title for title in sheets if title in existing]
+        )
+
+        data = []
+        for title, values in sheets.items():
+            data.extend(changed_ranges(title, current.get(title, []), values))
+
+        if data:
+            http_client.values_batch_update(
+                self.sheet_id,
+                {"valueInputOption": "RAW", "data": data}
+            )
+
+def _cell_text(value):
+    # Rendered the way the Sheets values API would show the cell.
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%d/%m/%Y")
+    return str(value)
+
+class XlsxBackend:
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, wanted=None):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            return {
+                title: _trim(
+                    [_cell_text(value) for value in row]
+                    for row in workbook[title].iter_rows(values_only=True)
+                )
+                for title in workbook.sheetnames
+                if wanted is None or title in wanted
+            }
+        finally:
+            workbook.close()
+
+    def write(self, sheets, keep_worksheet=None, drop_worksheets=()):
+        from openpyxl import Workbook, load_workbook
+
+        if os.path.exists(self.path):
+            workbook = load_workbook(self.path)
+        else:
+            workbook = Workbook()
+            workbook.remove(workbook.active)
+
+        for title, values in sheets.items():
+            # Recreating the tab in place is much cheaper than clearing it.
+            position = None
+            if title in workbook.sheetnames:
+                position = workbook.sheetnames.index(title)
+                workbook.remove(workbook[title])
+            worksheet = workbook.create_sheet(title, position)
+            for row in values:
+                worksheet.append(row)
+
+        for title in drop_worksheets:
+            if title in workbook.sheetnames and title not in sheets and title != keep_worksheet:
+                workbook.remove(workbook[title])
+
+        sheet_cache.replace_file(self.path, workbook.save)
+
+class ParquetBackend:
+    # One Parquet grid per tab, plus titles.json to keep the tab order.
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, title):
+        return os.path.join(self.directory, quote(title, safe=" -()") + ".parquet")
+
+    def titles(self):
+        try:
+            with open(os.path.join(self.directory, "titles.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        return [unquote(name[:-len(".parquet")]) for name in names if name.endswith(".parquet")]
+
+    def read(self, wanted=None):
+        # A missing directory is a mistyped locator, not an empty workbook;
+        # writing to one still creates it.
+        if not os.path.isdir(self.directory):
+            raise FileNotFoundError(f"Parquet workbook directory not found: {self.directory}")
+        workbook = {}
+        for title in self.titles():
+            if wanted is not None and title not in wanted:
+                continue
+            values = sheet_cache.read_grid(self._path(title))
+            if values is not None:
+                workbook[title] = _trim(values)
+        return workbook
+
+    def write(self, sheets, keep_worksheet=None, drop_worksheets=()):
+        titles = self.titles()
+        for title, values in sheets.items():
+            sheet_cache.write_grid(self._path(title), values)
+            if title not in titles:
+                titles.append(title)
+
+        for title in drop_worksheets:
+            if title in titles and title not in sheets and title != keep_worksheet:
+                titles.remove(title)
+                try:
+                    os.remove(self._path(title))
+                except FileNotFoundError:
+                    pass
+
+        def write_titles(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(titles, f)
+
+        sheet_cache.replace_file(os.path.join(self.directory, "titles.json"), write_titles)
+
+def backend_for(locator):
+    # Sheet IDs stay as they are; local workbooks are named with a prefix,
+    # e.g. "xlsx:exports/mis.xlsx" or "parquet:exports/mis".
+    if locator.startswith("xlsx:"):
+        return XlsxBackend(locator[len("xlsx:"):])
+    if locator.startswith("parquet:"):
+        return ParquetBackend(locator[len("parquet:"):])
+    if locator.lower().endswith(".xlsx"):
+        return XlsxBackend(locator)
+    return GoogleSheetsBackend(locator)
+
+def copy_workbook(source, target, wanted=None):
+    workbook = backend_for(source).read(wanted)
+    backend_for(target).write(workbook)
+    return list(workbook)
@@ -0,0 +1,112 @@
+import os
+import time
+import traceback
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import quota
+from utils.metrics import RunMetrics
+from utils.mrr import generate_financial_reports, seed_workbook
+from utils.stages import observe_stages
+
+PROCESSES = int(os.getenv("MRR_BATCH_PROCESSES", "0")) or os.cpu_count() or 1
+
+# output is where the reports are synced; None syncs back into the MIS
+# workbook, as the app does. Any other output starts as a copy of the MIS.
+BatchJob = namedtuple("BatchJob", ["invoice", "mis", "master", "month", "output"], defaults=(None,))
+
+def _start_worker(reads, writes):
+    quota.share_buckets(reads, writes)
+
+def _run_chain(chain, target):
+    # Jobs for one MIS workbook, run in order. A separate output is seeded
+    # with the MIS tabs once, then every job reads and syncs that copy, so
+    # each month builds on the one before.
+    seed_error = None
+    mis = chain[0][1].mis
+    if target and target != mis:
+        try:
+            seed_workbook(mis, target)
+            mis = target
+        except Exception:
+            seed_error = traceback.format_exc()
+
+    results = []
+    for index, job in chain:
+        metrics = RunMetrics()
+        submitted_at = time.time()
+        started = time.perf_counter()
+        status, error = "error", seed_error
+        if seed_error is None:
+            with observe_stages(metrics.record_stage):
+                try:
+                    generate_financial_reports(
+                        job.month,
+                        google_sheet_id=target,
+                        sheet_ids=(job.invoice, mis, job.master)
+                    )
+                    status = "done"
+                except Exception:
+                    error = traceback.format_exc()
+        results.append((index, metrics.write(
+            key=list(job),
+            status=status,
+            submitted_at=submitted_at,
+            wall_ms=round((time.perf_counter() - started) * 1000, 1),
+            pid=os.getpid(),
+            error=error
+        )))
+    return results
+
+def _chains(jobs, sync):
+    # One chain per MIS workbook, since each month's churn builds on the
+    # MIS the previous month wrote. Chains run side by side, so no two may
+    # write the same workbook.
+    chains = {}
+    for index, job in enumerate(jobs):
+        chains.setdefault(job.mis, []).append((index, job))
+
+    targets = {}
+    for mis, chain in chains.items():
+        if not sync:
+            if len(chain) > 1:
+                raise ValueError(f"{len(chain)} jobs read MIS workbook {mis}; chained months need sync")
+            targets[mis] = None
+            continue
+        outputs = {job.output or job.mis for _, job in chain}
+        if len(outputs) > 1:
+            raise ValueError(f"jobs for MIS workbook {mis} sync to different outputs: {sorted(outputs)}")
+        output = outputs.pop()
+        if output in targets.values() or (output != mis and output in chains):
+            raise ValueError(f"{output} is written by more than one chain of jobs")
+        targets[mis] = output
+    return chains, targets
+
+def run_batch(jobs, processes=None, sync=True):
+    # Chains run side by side in a process pool. Inside a worker the three
+    # workbooks of a job are still fetched concurrently, and all workers
+    # share one Sheets quota.
+    jobs = [BatchJob(*job) for job in jobs]
+    chains, targets = _chains(jobs, sync)
+    if not chains:
+        return []
+
+    # Spawned rather than forked: the parent may hold threads (the app's job
+    # pool, the Sheets connection pool) that a fork would copy mid-flight.
+    context = multiprocessing.get_context("spawn")
+    reads = quota.SharedTokenBucket(quota.READS_PER_MINUTE, context=context)
+    writes = quota.SharedTokenBucket(quota.WRITES_PER_MINUTE, context=context)
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(
+        max_workers=min(processes or PROCESSES, len(chains)),
+        mp_context=context,
+        initializer=_start_worker,
+        initargs=(reads, writes)
+    ) as pool:
+        futures = [pool.submit(_run_chain, chain, targets[mis]) for mis, chain in chains.items()]
+        for future in futures:
+            for index, result in future.result():
+                results[index] = result
+    return results
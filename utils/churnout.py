@@ -1,37 +1,31 @@
-from datetime import datetime
-
 import pandas as pd
 import numpy as np
 
-from dateutil.relativedelta import relativedelta
-
+from utils.activity import load_activity, save_activity
 from utils.generate_pivot import generate_pivots
+from utils.get_sheet import declare_sheets
+from utils.stages import stage
 
-def get_previous_month_str(month_name):
-    try:
-        dt = datetime.strptime(month_name, "%b-%y")
-        return (dt - relativedelta(months=1)).strftime("%b-%y")
-    except:
-        return None
+declare_sheets("mis", "Active Subscriber", "Addition", "Deletions", "Customer churnout")
 
-def churnout(month_name):
-    mis_sheets, sales_data = generate_pivots(month_name)
+@stage("churnout")
+def churnout(month_name, sheet_ids=None, sync_target=None):
+    mis_sheets, sales_data, schedule = generate_pivots(month_name, sheet_ids, sync_target)
 
     last_col = sales_data.columns[-1]
-    sales_work_df = sales_data.copy()
 
-    sales_work_df[last_col] = (
-        sales_work_df[last_col]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .str.strip()
-    )
-    sales_work_df[last_col] = pd.to_numeric(
-        sales_work_df[last_col], errors="coerce"
-    ).fillna(0)
+    last_sales = sales_data[last_col]
+    if not pd.api.types.is_numeric_dtype(last_sales):
+        last_sales = (
+            last_sales
+            .astype(str)
+            .str.replace(",", "", regex=False)
+            .str.strip()
+        )
+    last_sales = pd.to_numeric(last_sales, errors="coerce").fillna(0)
 
     active_companies = (
-        sales_work_df.loc[sales_work_df[last_col] > 0, "Customer Name"]
+        sales_data.loc[last_sales > 0, "Customer Name"]
         .dropna()
         .astype(str)
         .str.strip()
@@ -44,24 +38,23 @@ def churnout(month_name):
 
     active_df = mis_sheets["Active Subscriber"]
 
+    # Movements come from the persisted customer x month store; the sheet
+    # column is still written so the history stays readable there.
+    sheet_id = active_df.attrs.get("spreadsheet_id")
+    activity = load_activity(sheet_id, active_df)
+    activity.set_month(month_name, active_companies)
+    movements = activity.movements(month_name)
+    if sheet_id == sync_target:
+        save_activity(sheet_id, activity)
+
     if len(active_companies) > len(active_df):
         active_df = active_df.reindex(range(len(active_companies)))
         mis_sheets["Active Subscriber"] = active_df
 
     mis_sheets["Active Subscriber"][month_name] = pd.Series(active_companies)
 
-    current_df = mis_sheets["Active Subscriber"]
-    additions = []
-    deletions = []
-
-    if current_df.shape[1] >= 2:
-        current = set(current_df.iloc[:, -1].dropna().astype(str).str.strip())
-        previous = set(current_df.iloc[:, -2].dropna().astype(str).str.strip())
-        additions = list(current - previous)
-        deletions = list(previous - current)
-    elif current_df.shape[1] == 1:
-        additions = current_df.iloc[:, 0].dropna().tolist()
-        deletions = []
+    additions = movements.additions
+    deletions = movements.deletions
 
     if "Addition" in mis_sheets:
         df_add = mis_sheets["Addition"]
@@ -100,7 +93,9 @@ def churnout(month_name):
         mis_sheets["Deletions"] = df_del
 
     if "Customer churnout" in mis_sheets:
-        df_churn = mis_sheets["Customer churnout"]
+        # Counts go into cells read as text, which pandas 3's str columns
+        # refuse.
+        df_churn = mis_sheets["Customer churnout"].astype(object)
 
         r_header = 3
         r_begin = 4
@@ -108,7 +103,6 @@ def churnout(month_name):
         r_less = 6
         r_end = 7
 
-        prev_month_name = get_previous_month_str(month_name)
         header_values = df_churn.iloc[r_header].astype(str).str.strip().tolist()
 
         try:
@@ -120,23 +114,12 @@ def churnout(month_name):
             ]
             target_col_idx = valid_indices[-1] + 1 if valid_indices else 1
             if target_col_idx >= df_churn.shape[1]:
-                df_churn[f"col_{target_col_idx}"] = np.nan
-
-        try:
-            prev_col_idx = header_values.index(prev_month_name) if prev_month_name else -1
-        except ValueError:
-            prev_col_idx = -1
-
-        begin_count = 0
-        if prev_col_idx != -1:
-            try:
-                begin_count = float(str(df_churn.iloc[r_end, prev_col_idx]).replace(",", ""))
-            except:
-                begin_count = 0
+                df_churn[f"col_{target_col_idx}"] = pd.Series(np.nan, index=df_churn.index, dtype=object)
 
+        begin_count = movements.beginning
         add_count = len(additions)
         del_count = len(deletions)
-        end_count = len(active_companies)
+        end_count = movements.ending
 
         df_churn.iloc[r_header, target_col_idx] = month_name
         df_churn.iloc[r_begin, target_col_idx] = begin_count
@@ -146,4 +129,4 @@ def churnout(month_name):
 
         mis_sheets["Customer churnout"] = df_churn
 
-    return mis_sheets
\ No newline at end of file
+    return mis_sheets, sales_data, schedule
\ No newline at end of file
@@ -1,12 +1,33 @@
+import logging
+
 import pandas as pd
 
-from utils.get_sheet import get_sheet
-from utils.normalize import normalize_invoice_column
+from utils.get_sheet import declare_sheets, get_sheet
+from utils.ingest import ingest
+from utils.normalize import normalize_invoice_column, split_invoice_keys
+from utils.stages import stage
+
+logger = logging.getLogger(__name__)
+
+declare_sheets("invoice", "Invoice (2)")
+declare_sheets("master", "FY 25-26")
 
 def normalize_master_invoices(df):
     df = normalize_invoice_column(df, col_name="Invoice", default_year="25-26")
     return df
 
+def report_fanout(master_lookup):
+    counts = master_lookup['Matched_Invoice_Key'].value_counts()
+    duplicates = counts[counts > 1]
+    if not duplicates.empty:
+        logger.warning(
+            "%d invoice keys appear on more than one master row (%d extra matches), e.g. %s",
+            len(duplicates),
+            int((duplicates - 1).sum()),
+            ", ".join(duplicates.index[:5])
+        )
+    return duplicates
+
 def match_invoices(invoice_df, master_df):
     master_cols = [
         "Nature of service", 
@@ -17,27 +38,21 @@ def match_invoices(invoice_df, master_df):
     ]
     
     existing_master_cols = [col for col in master_cols if col in master_df.columns]
-    
-    expanded_rows = []
-    
-    for idx, row in master_df.iterrows():
-        inv_val = row.get('Invoice', '')
-        
-        if pd.isna(inv_val):
-            continue
-        
-        invoices = [x.strip() for x in str(inv_val).split(',') if x.strip()]
-        
-        for inv in invoices:
-            data = {col: row[col] for col in existing_master_cols}
-            data['Matched_Invoice_Key'] = inv
-            expanded_rows.append(data)
-            
-    master_lookup = pd.DataFrame(expanded_rows)
-    
-    if master_lookup.empty:
+
+    if 'Invoice' not in master_df.columns:
         return pd.DataFrame()
-        
+
+    keys = split_invoice_keys(master_df['Invoice'])
+
+    if keys.empty:
+        return pd.DataFrame()
+
+    master_lookup = master_df.loc[keys.index, existing_master_cols]
+    master_lookup['Matched_Invoice_Key'] = keys.to_numpy()
+    master_lookup = master_lookup.rename_axis('Master Row').reset_index()
+
+    report_fanout(master_lookup)
+
     merged = pd.merge(
         invoice_df[['Invoice Number', 'Customer Name']],
         master_lookup,
@@ -48,20 +63,17 @@ def match_invoices(invoice_df, master_df):
     
     final_cols = ['Invoice Number', 'Customer Name'] + existing_master_cols
     
-    return merged[final_cols]
+    # Indexed by master row so callers can go back to the sheet's own text.
+    return merged.set_index('Master Row')[final_cols]
 
-def extract_data():
-    invoice_sheets, mis_sheets, master_sheets = get_sheet()
+@stage("extract_data")
+def extract_data(sheet_ids=None):
+    invoice_sheets, mis_sheets, master_sheets = get_sheet(sheet_ids)
 
-    invoice_sheets['Invoice (2)'] = invoice_sheets['Invoice (2)'].drop_duplicates()
+    tables = ingest(invoice_sheets, mis_sheets, master_sheets)
 
-    new_header = master_sheets["FY 25-26"].iloc[1]
-    master_sheets["FY 25-26"] = master_sheets["FY 25-26"].iloc[2:]
-    master_sheets["FY 25-26"].columns = new_header
-    master_sheets["FY 25-26"] = master_sheets["FY 25-26"].reset_index(drop=True)
-    
-    master_sheets["FY 25-26"] = normalize_master_invoices(master_sheets["FY 25-26"])
+    master_df = normalize_master_invoices(tables["FY 25-26"].typed)
 
-    matched_df = match_invoices(invoice_sheets['Invoice (2)'], master_sheets["FY 25-26"])
+    matched_df = match_invoices(tables["Invoice (2)"].typed, master_df)
 
-    return matched_df, mis_sheets
\ No newline at end of file
+    return matched_df, tables, mis_sheets
\ No newline at end of file
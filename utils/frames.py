@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.schedule import NULL_MARKERS, clean_currency, parse_date
+
+# pandas 3 always copies on write; on 2.x it has to be switched on so stages
+# can hand frames to each other without defensive .copy() calls.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+CATEGORY_COLUMNS = ["Customer Name", "Payment Cycle "]
+DATE_COLUMNS = ["Start Date ", "End Date"]
+AMOUNT_COLUMNS = [" Contract Amount ", "Contract Amount"]
+
+def null_markers(values):
+    text = pd.Series(values).dropna().astype(str).str.strip()
+    counts = text[text.isin(NULL_MARKERS)].value_counts()
+    return {marker: int(count) for marker, count in counts.items()}
+
+def typed_frame(df):
+    typed = df.copy(deep=False)
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            typed[col] = parse_date(df[col])
+    for col in AMOUNT_COLUMNS:
+        if col in df.columns:
+            typed[col] = clean_currency(df[col])
+    return typed
+
+def compact_frame(df):
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
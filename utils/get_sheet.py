@@ -1,40 +1,47 @@
-import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from dotenv import load_dotenv
+from gspread.utils import fill_gaps
 
+from utils.backends import backend_for
 from utils.load_sheet_id import get_sheet_ids
+from utils.stages import carry_context, stage
 
-load_dotenv()
+SHEET_MANIFEST = {"invoice": [], "mis": [], "master": []}
 
-credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-creds_dict = json.loads(credentials_json)
+def declare_sheets(workbook, *titles):
+    for title in titles:
+        if title not in SHEET_MANIFEST[workbook]:
+            SHEET_MANIFEST[workbook].append(title)
 
-scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-client = gspread.authorize(credentials)
+def values_to_dataframe(values):
+    if not values:
+        return pd.DataFrame()
+    values = fill_gaps(values)
+    headers = []
+    for i, h in enumerate(values[0]):
+        headers.append(h if h.strip() != "" else f"col_{i}")
+    return pd.DataFrame(values[1:], columns=headers)
 
-def get_all_sheets(sheet_id):
-    sh = client.open_by_key(sheet_id)
-    worksheets = sh.worksheets()
+def get_all_sheets(sheet_id, wanted=None):
     dataframes = {}
-    for ws in worksheets:
-        values = ws.get_all_values()
-        headers = []
-        for i, h in enumerate(values[0]):
-            headers.append(h if h.strip() != "" else f"col_{i}")
-        df = pd.DataFrame(values[1:], columns=headers)
-        dataframes[ws.title] = df
+    for title, values in backend_for(sheet_id).read(wanted).items():
+        df = values_to_dataframe(values)
+        df.attrs["spreadsheet_id"] = sheet_id
+        dataframes[title] = df
     return dataframes
 
-def get_sheet():
-    invoice_sheet_id, mis_sheet_id, master_sheet_id = get_sheet_ids()
+@stage("get_sheet")
+def get_sheet(sheet_ids=None):
+    if sheet_ids is None:
+        sheet_ids = get_sheet_ids()
+    wanted = [
+        SHEET_MANIFEST["invoice"],
+        SHEET_MANIFEST["mis"],
+        SHEET_MANIFEST["master"]
+    ]
 
-    invoice_sheets = get_all_sheets(invoice_sheet_id)
-    mis_sheets = get_all_sheets(mis_sheet_id)
-    master_sheets = get_all_sheets(master_sheet_id)
+    with ThreadPoolExecutor(max_workers=len(sheet_ids)) as pool:
+        invoice_sheets, mis_sheets, master_sheets = pool.map(carry_context(get_all_sheets), sheet_ids, wanted)
 
-    return invoice_sheets, mis_sheets, master_sheets
\ No newline at end of file
+    return invoice_sheets, mis_sheets, master_sheets
@@ -0,0 +1,74 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import gspread
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from utils.quota import ScheduledHTTPClient
+from utils.stages import record_call
+
+load_dotenv()
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.metadata.readonly"
+]
+
+POOL_SIZE = int(os.getenv("GSHEETS_POOL_SIZE", "10"))
+REFRESH_AHEAD = timedelta(seconds=int(os.getenv("GSHEETS_REFRESH_AHEAD_SECONDS", "300")))
+
+_client = None
+_credentials = None
+_session = None
+_token_request = None
+_lock = threading.Lock()
+
+def _record_response(response, *args, **kwargs):
+    body = response.request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    record_call("sheets", sent=len(body), received=len(response.content))
+
+def _build_client():
+    global _client, _credentials, _session, _token_request
+
+    creds_dict = json.loads(os.getenv("GOOGLE_CREDENTIALS_JSON"))
+    _credentials = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+
+    _session = AuthorizedSession(_credentials)
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    _session.mount("https://", adapter)
+    _session.hooks["response"].append(_record_response)
+
+    # Token refreshes go through their own plain session: through the
+    # authorized one they would carry a Bearer header, trigger a nested
+    # refresh and be counted as Sheets calls.
+    _token_request = Request()
+
+    _client = gspread.Client(_credentials, session=_session, http_client=ScheduledHTTPClient)
+
+def _refresh_ahead():
+    # google-auth stores expiry as naive UTC.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if _credentials.token is None or _credentials.expiry is None or _credentials.expiry - now < REFRESH_AHEAD:
+        _credentials.refresh(_token_request)
+
+def use_client(client):
+    # Installs a ready-made client, e.g. the offline stand-in in bench/;
+    # get_client() then hands it out without credentials or refreshes.
+    global _client, _credentials, _session
+    with _lock:
+        _client, _credentials, _session = client, None, None
+
+def get_client():
+    with _lock:
+        if _client is None:
+            _build_client()
+        if _credentials is not None:
+            _refresh_ahead()
+        return _client
@@ -0,0 +1,39 @@
+import logging
+from collections import namedtuple
+
+from utils.frames import AMOUNT_COLUMNS, DATE_COLUMNS, null_markers, typed_frame
+from utils.stages import stage
+
+logger = logging.getLogger(__name__)
+
+# text keeps the cells as read so they can be written back unchanged; typed
+# has the date and amount columns parsed once, row for row with text.
+Table = namedtuple("Table", ["text", "typed"])
+
+def read_table(sheet, header_row=1):
+    text = sheet.iloc[header_row + 1:]
+    text.columns = sheet.iloc[header_row].values
+    text = text.reset_index(drop=True)
+    return Table(text, typed_frame(text))
+
+def report_null_markers(title, text):
+    for col in DATE_COLUMNS + AMOUNT_COLUMNS:
+        if col in text.columns:
+            counts = null_markers(text[col])
+            if counts:
+                logger.info("%s[%r] read as empty: %s", title, col, counts)
+
+@stage("ingest")
+def ingest(invoice_sheets, mis_sheets, master_sheets):
+    invoices = invoice_sheets["Invoice (2)"].drop_duplicates()
+
+    tables = {
+        "Invoice (2)": Table(invoices, invoices),
+        "FY 25-26": read_table(master_sheets["FY 25-26"]),
+        "FY 25-26-Accrual": read_table(mis_sheets["FY 25-26-Accrual"]),
+    }
+
+    for title, table in tables.items():
+        report_null_markers(title, table.text)
+
+    return tables
@@ -0,0 +1,67 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+from utils.normalize import split_invoice_keys
+from utils.sheet_cache import CACHE_DIR, replace_file
+
+INDEX_DIR = os.path.join(CACHE_DIR, "invoice_index")
+
+def _index_path(sheet_id):
+    return os.path.join(INDEX_DIR, hashlib.sha1(sheet_id.encode("utf-8")).hexdigest() + ".json")
+
+def _digest(hashed_rows):
+    return hashlib.sha1(hashed_rows.tobytes()).hexdigest()
+
+def _load_index(sheet_id):
+    try:
+        with open(_index_path(sheet_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_index(sheet_id, index):
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+
+    replace_file(_index_path(sheet_id), write)
+
+def attached_invoices(sheet_id, invoices, save=True):
+    invoices = invoices.reset_index(drop=True)
+    hashed_rows = pd.util.hash_pandas_object(invoices, index=False).to_numpy()
+
+    index = _load_index(sheet_id) if sheet_id else None
+
+    # The stored index covers the first `rows` accrual rows; it is reused only
+    # if those rows are unchanged, so edits made on the sheet force a rebuild.
+    # Checking that still hashes every row on each run (one vectorized pass);
+    # what the index saves is splitting and exploding the rows already seen.
+    if (
+        index is not None
+        and index["rows"] <= len(invoices)
+        and index["digest"] == _digest(hashed_rows[:index["rows"]])
+    ):
+        keys = index["keys"]
+        indexed_rows = index["rows"]
+    else:
+        keys = {}
+        indexed_rows = 0
+
+    if indexed_rows == len(invoices) and index is not None:
+        return keys
+
+    new_keys = split_invoice_keys(invoices.iloc[indexed_rows:])
+    for key, row in zip(new_keys.tolist(), new_keys.index.tolist()):
+        keys.setdefault(key, row)
+
+    if sheet_id and save:
+        _save_index(sheet_id, {
+            "rows": len(invoices),
+            "digest": _digest(hashed_rows),
+            "keys": keys
+        })
+
+    return keys
@@ -0,0 +1,90 @@
+import os
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import RunMetrics
+from utils.stages import observe_stages
+
+MAX_WORKERS = int(os.getenv("MRR_JOB_WORKERS", "2"))
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.submitted_at = time.time()
+        self.events = []
+        self.future = None
+        self.traceback = None
+        self.metrics = RunMetrics()
+        self._lock = threading.Lock()
+
+    def record_stage(self, name, status, details=None):
+        if status == "call":
+            return
+        with self._lock:
+            self.events.append((time.time(), name, status))
+
+    def stages(self):
+        with self._lock:
+            events = list(self.events)
+        status = {}
+        for _, name, state in events:
+            status[name] = state
+        return status
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def exception(self):
+        return self.future.exception() if self.done() else None
+
+class JobRunner:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mrr-job")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        # Identical requests share one in-flight job instead of repeating the
+        # fetch, compute and sync.
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job
+            job = Job(key)
+            self._in_flight[key] = job
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            job.future.add_done_callback(lambda _: self._finish(job))
+            return job
+
+    def _run(self, job, fn, args, kwargs):
+        status = "error"
+        with observe_stages(job.record_stage), observe_stages(job.metrics.record_stage):
+            try:
+                result = fn(*args, **kwargs)
+                status = "done"
+                return result
+            except BaseException:
+                job.traceback = traceback.format_exc()
+                raise
+            finally:
+                job.metrics.write(
+                    key=list(job.key) if isinstance(job.key, tuple) else job.key,
+                    status=status,
+                    submitted_at=job.submitted_at
+                )
+
+    def _finish(self, job):
+        with self._lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+
+    def in_flight(self, key):
+        with self._lock:
+            return self._in_flight.get(key)
+
+runner = JobRunner()
@@ -1,27 +1,86 @@
 import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from supabase import create_client, Client
-import pandas as pd
 from dotenv import load_dotenv
 
+from utils.stages import carry_context, record_call
+
 load_dotenv()
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
+SHEET_ID_TABLES = ("coro_invoices_sheet", "coro_mis_sheet", "coro_master_sheet")
+SHEET_ID_TTL_SECONDS = float(os.getenv("SHEET_ID_TTL_SECONDS", "300"))
 
-supabase: Client = create_client(url, key)
+_client = None
+_client_lock = threading.Lock()
 
-def get_sheet_ids():
-    invoices = supabase.table("coro_invoices_sheet").select("*").execute()
-    mis = supabase.table("coro_mis_sheet").select("*").execute()
-    master = supabase.table("coro_master_sheet").select("*").execute()
+_config = {"rows": None, "expires_at": 0.0}
+_config_lock = threading.Lock()
+
+# Row ids survive invalidation, so saving the form does not have to re-read
+# each table before updating it.
+_row_ids = {}
+
+def get_supabase():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from supabase import create_client
+
+            _client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return _client
+
+def _execute(query, payload=None):
+    # The client does not expose the wire bytes, so the JSON bodies stand in.
+    res = query.execute()
+    record_call(
+        "supabase",
+        sent=len(json.dumps(payload)) if payload is not None else 0,
+        received=len(json.dumps(res.data, default=str))
+    )
+    return res
 
-    df_invoices = pd.DataFrame(invoices.data)
-    df_mis = pd.DataFrame(mis.data)
-    df_master = pd.DataFrame(master.data)
+def _fetch_config_row(table_name):
+    res = _execute(get_supabase().table(table_name).select("*").limit(1))
+    return res.data[0] if res.data else {}
 
-    invoice_sheet_id = df_invoices["sheet_id"].iloc[0]
-    mis_sheet_id = df_mis["sheet_id"].iloc[0]
-    master_sheet_id = df_master["sheet_id"].iloc[0]
+def _config_rows():
+    with _config_lock:
+        if _config["rows"] is not None and time.monotonic() < _config["expires_at"]:
+            return _config["rows"]
+
+        # PostgREST cannot combine unrelated tables in one request, so the
+        # three single-row lookups go out together and cost one round-trip.
+        with ThreadPoolExecutor(max_workers=len(SHEET_ID_TABLES)) as pool:
+            rows = dict(zip(SHEET_ID_TABLES, pool.map(carry_context(_fetch_config_row), SHEET_ID_TABLES)))
+
+        _config["rows"] = rows
+        _row_ids.update({table: row.get("id") for table, row in rows.items()})
+        _config["expires_at"] = time.monotonic() + SHEET_ID_TTL_SECONDS
+        return rows
+
+def invalidate_sheet_ids():
+    with _config_lock:
+        _config["rows"] = None
+        _config["expires_at"] = 0.0
+
+def get_sheet_ids():
+    rows = _config_rows()
+    return tuple(rows[table].get("sheet_id", "") for table in SHEET_ID_TABLES)
 
-    return invoice_sheet_id, mis_sheet_id, master_sheet_id
\ No newline at end of file
+def update_sheet_id(table_name, new_sheet_id):
+    row_id = _row_ids.get(table_name)
+    if row_id is None:
+        row_id = _fetch_config_row(table_name).get("id")
+    payload = {"sheet_id": new_sheet_id}
+    try:
+        if row_id is not None:
+            _execute(get_supabase().table(table_name).update(payload).eq("id", row_id), payload)
+            return
+        res = _execute(get_supabase().table(table_name).insert(payload), payload)
+        if res.data:
+            _row_ids[table_name] = res.data[0].get("id")
+    finally:
+        invalidate_sheet_ids()
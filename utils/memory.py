@@ -0,0 +1,70 @@
+import resource
+import weakref
+import threading
+
+def _read_status_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_peak():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux >= 4.0).
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def current_rss_kb():
+    return _read_status_kb("VmRSS")
+
+def peak_rss_kb():
+    peak = _read_status_kb("VmHWM")
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak
+
+# VmHWM is one counter for the whole process, and concurrent jobs each keep
+# a report. Before it is reset, the peak is folded into the open stages of
+# every live report, so one job's reset never hides a peak from another.
+# Stages that overlap another job's therefore see the process-wide peak.
+_reports = weakref.WeakSet()
+_fold_lock = threading.Lock()
+_resettable = _reset_peak()
+
+def _fold_peak():
+    global _resettable
+    with _fold_lock:
+        peak = peak_rss_kb()
+        for report in list(_reports):
+            for name in report._open:
+                report._peaks[name] = max(report._peaks.get(name, 0), peak)
+        if _resettable:
+            _resettable = _reset_peak()
+
+class MemoryReport:
+    def __init__(self):
+        self.rows = []
+        self._open = []
+        self._peaks = {}
+        _reports.add(self)
+
+    def record_stage(self, name, status):
+        _fold_peak()
+        if status == "start":
+            self._open.append(name)
+            return
+        if name in self._open:
+            self._open.remove(name)
+        self.rows.append({
+            "stage": name,
+            "status": status,
+            "peak_rss_mb": round(self._peaks.pop(name, 0) / 1024, 1),
+            "rss_mb": round((current_rss_kb() or 0) / 1024, 1)
+        })
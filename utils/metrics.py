@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import threading
+
+from utils.memory import MemoryReport
+from utils.sheet_cache import CACHE_DIR
+
+METRICS_PATH = os.getenv("MRR_METRICS_PATH", os.path.join(CACHE_DIR, "metrics", "runs.jsonl"))
+
+SERVICES = ("sheets", "supabase")
+
+def count_rows(value):
+    if getattr(value, "ndim", None) in (1, 2):
+        return len(value)
+    if hasattr(value, "_fields"):
+        # Namedtuples such as Table and Schedule hold parallel views of the
+        # same rows.
+        return max((count_rows(v) for v in value), default=0)
+    if isinstance(value, dict):
+        return sum(count_rows(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(count_rows(v) for v in value)
+    return 0
+
+class RunMetrics:
+    def __init__(self):
+        self.rows = []
+        self.memory = MemoryReport()
+        self._open = []
+        self._lock = threading.Lock()
+
+    def record_stage(self, name, status, details=None):
+        details = details or {}
+        with self._lock:
+            if status == "call":
+                # Nested stages report inclusive totals, like their wall time.
+                for entry in self._open:
+                    entry[f"{name}_calls"] = entry.get(f"{name}_calls", 0) + 1
+                    entry[f"{name}_bytes_sent"] = entry.get(f"{name}_bytes_sent", 0) + details.get("sent", 0)
+                    entry[f"{name}_bytes_received"] = entry.get(f"{name}_bytes_received", 0) + details.get("received", 0)
+                return
+
+            self.memory.record_stage(name, status)
+
+            if status == "start":
+                entry = {
+                    "stage": name,
+                    "wall": time.perf_counter(),
+                    "cpu": time.process_time(),
+                    "rows_in": count_rows([details.get("args"), details.get("kwargs")])
+                }
+                for service in SERVICES:
+                    entry[f"{service}_calls"] = 0
+                    entry[f"{service}_bytes_sent"] = 0
+                    entry[f"{service}_bytes_received"] = 0
+                self._open.append(entry)
+                return
+
+            for i in range(len(self._open) - 1, -1, -1):
+                if self._open[i]["stage"] == name:
+                    entry = self._open.pop(i)
+                    break
+            else:
+                return
+
+            memory = self.memory.rows[-1]
+            self.rows.append({
+                "stage": name,
+                "status": status,
+                "wall_ms": round((time.perf_counter() - entry.pop("wall")) * 1000, 1),
+                "cpu_ms": round((time.process_time() - entry.pop("cpu")) * 1000, 1),
+                "peak_rss_mb": memory["peak_rss_mb"],
+                "rows_in": entry.pop("rows_in"),
+                "rows_out": count_rows(details.get("result")),
+                **{k: v for k, v in entry.items() if k != "stage"}
+            })
+
+    def write(self, **fields):
+        entry = {"event": "run", **fields, "stages": self.rows}
+        line = json.dumps(entry, default=str)
+        print(line, flush=True)
+        try:
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            with open(METRICS_PATH, "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+        return entry
@@ -1,220 +1,202 @@
-import os
-import json
-from datetime import datetime
+import threading
 
 import pandas as pd
 import numpy as np
-import gspread
-from google.oauth2.service_account import Credentials
 from dotenv import load_dotenv
-from dateutil.relativedelta import relativedelta
 
+from utils.backends import backend_for, copy_workbook
 from utils.churnout import churnout
+from utils.generate_pivot import RETIRED_SHEETS
+from utils.get_sheet import SHEET_MANIFEST, declare_sheets
+from utils.normalize import split_invoice_keys
+from utils.schedule import fiscal_months
+from utils.sheet_diff import sheet_values
+from utils.stages import stage
 
 
 load_dotenv()
 
+declare_sheets("mis", "Invoices", "FY 25-26-Accrual")
 
-def clean_currency(val):
-    if pd.isna(val):
-        return 0.0
-    s = str(val).strip()
-    if s in ["", "-"]:
-        return 0.0
-    try:
-        return float(s.replace(",", ""))
-    except:
-        return 0.0
+_sync_locks = {}
+_sync_locks_guard = threading.Lock()
 
 
-def find_nature(row, invoice_nature_map):
-    invoice_val = str(row["Invoice"])
-    for sep in [",", "/", "\n"]:
-        invoice_val = invoice_val.replace(sep, ",")
-    invoice_list = [x.strip() for x in invoice_val.split(",") if x.strip()]
+def sync_lock(google_sheet_id):
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(google_sheet_id, threading.Lock())
 
-    for inv in invoice_list:
-        if inv in invoice_nature_map:
-            val = invoice_nature_map[inv]
-            if pd.notna(val) and str(val).lower() != "nan":
-                return val
 
-    if "B2C" in str(row.get("Customer Name", "")).upper():
-        return "B2C"
-    return "B2B"
-
-
-def generate_revenue_report(df, value_columns, month_names):
-    b2b_df = df[df["Nature"] == "B2B"].copy()
-
-    for col in value_columns:
-        if col not in b2b_df.columns:
-            b2b_df[col] = 0.0
-
-    b2b_grouped = b2b_df.groupby("Payment Cycle ")[value_columns].sum()
-    b2b_grouped.columns = month_names
-
-    total_b2b = b2b_grouped.sum()
-
-    b2c_df = df[df["Nature"] == "B2C"].copy()
-    for col in value_columns:
-        if col not in b2c_df.columns:
-            b2c_df[col] = 0.0
-
-    total_b2c = b2c_df[value_columns].sum()
-    total_b2c.index = month_names
-
-    total_revenue = total_b2b + total_b2c
-
-    exclude_keywords = [
-        "one time", "days", "10-days", "12-days",
-        "15-days", "19-days", "38 -days"
-    ]
-
-    def is_recurring(x):
-        s = str(x).lower()
-        return not any(k in s for k in exclude_keywords)
-
-    b2b_recurring = b2b_df[b2b_df["Payment Cycle "].apply(is_recurring)]
-
-    mrr_b2b = b2b_recurring[value_columns].sum()
-    mrr_b2b.index = month_names
-
-    active_subs = pd.Series(
-        [b2b_recurring[b2b_recurring[c] > 1].shape[0] for c in value_columns],
-        index=month_names
+def classify_nature(df_accrual, df_invoices):
+    nature_map = pd.Series(
+        df_invoices["Nature"].to_numpy(),
+        index=df_invoices["Invoice Number"].astype(str).str.strip()
     )
+    nature_map = nature_map[~nature_map.index.duplicated(keep="last")]
+    nature_map = nature_map[
+        nature_map.notna() & (nature_map.astype(str).str.lower() != "nan")
+    ]
 
-    arpu = mrr_b2b / active_subs.replace(0, 1)
-    arr = mrr_b2b * 12
-
-    rows = []
-
-    rows.append({**total_b2b.to_dict(), "Particulars": "Total monthly revenue from B2B subscribers excluding GST (A)"})
+    keys = split_invoice_keys(df_accrual["Invoice"].astype(str), separators=",/\n")
+    matches = keys.map(nature_map).dropna()
+    nature = matches[~matches.index.duplicated(keep="first")].reindex(df_accrual.index)
+
+    if "Customer Name" in df_accrual.columns:
+        is_b2c = (
+            df_accrual["Customer Name"]
+            .astype(str)
+            .str.upper()
+            .str.contains("B2C", regex=False)
+            .fillna(False)
+            .to_numpy(dtype=bool)
+        )
+    else:
+        is_b2c = np.zeros(len(df_accrual), dtype=bool)
 
-    for cycle, data in b2b_grouped.iterrows():
-        rows.append({**data.to_dict(), "Particulars": cycle})
+    fallback = pd.Series(np.where(is_b2c, "B2C", "B2B"), index=df_accrual.index, dtype=object)
+    return nature.astype(object).where(nature.notna(), fallback)
 
-    rows.append({"Particulars": ""})
-    rows.append({**total_b2c.to_dict(), "Particulars": "Total monthly revenue from B2C subscribers (B)"})
-    rows.append({**total_revenue.to_dict(), "Particulars": "Total monthly revenue from B2B and B2C C=A+B"})
-    rows.append({"Particulars": ""})
 
-    rows.append({**mrr_b2b.to_dict(), "Particulars": "Monthly Recurring revenue (excluding one time and others)-B2B"})
-    rows.append({**active_subs.to_dict(), "Particulars": "No. of active subscribers-B2B"})
-    rows.append({**arpu.to_dict(), "Particulars": "Monthly recurring revenue per subscriber"})
-    rows.append({**arr.to_dict(), "Particulars": "Total Annual Recurring revenue (excluding one time and others)-B2B"})
+NON_RECURRING_KEYWORDS = [
+    "one time", "days", "10-days", "12-days",
+    "15-days", "19-days", "38 -days"
+]
 
-    report = pd.DataFrame(rows)
-    return report[["Particulars"] + month_names]
 
+def is_recurring(cycle):
+    s = str(cycle).lower()
+    return not any(k in s for k in NON_RECURRING_KEYWORDS)
 
-def sync_to_google_sheet(mis_sheets, google_sheet_id, keep_worksheet="Invoices"):
-    creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-    creds_dict = json.loads(creds_json)
 
-    creds = Credentials.from_service_account_info(
-        creds_dict,
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
+@stage("generate_revenue_reports")
+def generate_revenue_reports(df, measures, month_names):
+    # One report per measure (name -> rows x months array). Rows are put in
+    # groups once: a B2B group per payment cycle, then B2B rows without a
+    # cycle, B2C rows and everything else. All measures, and the rows above
+    # 1 that count as active subscribers, are summed in one groupby.
+    cycles = pd.Categorical(df["Payment Cycle "])
+    k = len(cycles.categories)
+    nature = df["Nature"].to_numpy()
+    groups = np.where(
+        nature == "B2B",
+        np.where(cycles.codes >= 0, cycles.codes, k),
+        np.where(nature == "B2C", k + 1, k + 2)
     )
 
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_key(google_sheet_id)
+    # B2B rows without a cycle still count as recurring, as "nan" does.
+    recurring = np.append([is_recurring(c) for c in cycles.categories], [True, False, False])
+
+    names = list(measures)
+    m = len(month_names)
+    stacked = np.hstack(
+        [measures[name] for name in names] + [measures[name] > 1 for name in names]
+    ).astype(float)
+    sums = pd.DataFrame(stacked, index=df.index).groupby(groups).sum()
+    present = sums.index.to_numpy()
+    sums = sums.to_numpy()
+
+    by_cycle = present < k
+    b2c = present == k + 1
+    b2b_recurring = (present <= k) & recurring[present]
+
+    particulars = (
+        ["Total monthly revenue from B2B subscribers excluding GST (A)"]
+        + list(cycles.categories[present[by_cycle]])
+        + [
+            "",
+            "Total monthly revenue from B2C subscribers (B)",
+            "Total monthly revenue from B2B and B2C C=A+B",
+            "",
+            "Monthly Recurring revenue (excluding one time and others)-B2B",
+            "No. of active subscribers-B2B",
+            "Monthly recurring revenue per subscriber",
+            "Total Annual Recurring revenue (excluding one time and others)-B2B"
+        ]
+    )
+    blank = np.full(m, np.nan)
+
+    reports = {}
+    for i, name in enumerate(names):
+        values = sums[:, i * m:(i + 1) * m]
+        active = sums[:, (len(names) + i) * m:(len(names) + i + 1) * m]
+
+        b2b_grouped = values[by_cycle]
+        total_b2b = b2b_grouped.sum(axis=0)
+        total_b2c = values[b2c].sum(axis=0)
+        mrr_b2b = values[b2b_recurring].sum(axis=0)
+        active_subs = active[b2b_recurring].sum(axis=0)
+
+        report = pd.DataFrame(
+            np.vstack([
+                total_b2b,
+                b2b_grouped,
+                blank,
+                total_b2c,
+                total_b2b + total_b2c,
+                blank,
+                mrr_b2b,
+                active_subs,
+                mrr_b2b / np.where(active_subs == 0, 1, active_subs),
+                mrr_b2b * 12
+            ]),
+            columns=month_names
+        )
+        report.insert(0, "Particulars", particulars)
+        reports[name] = report
+    return reports
 
-    for ws in spreadsheet.worksheets():
-        if ws.title == keep_worksheet:
-            continue
-        if len(spreadsheet.worksheets()) > 1:
-            spreadsheet.del_worksheet(ws)
 
-    for sheet_name, df in mis_sheets.items():
-        if sheet_name == keep_worksheet:
-            continue
+def seed_workbook(mis_sheet_id, output):
+    # Runs that write somewhere other than the MIS workbook copy its tabs to
+    # the output first and then read and write only the copy, so each month
+    # builds on the last and the source MIS is never changed.
+    return copy_workbook(mis_sheet_id, output, SHEET_MANIFEST["mis"])
 
-        rows, cols = df.shape
-        ws = spreadsheet.add_worksheet(
-            title=sheet_name[:100],
-            rows=max(rows + 1, 1),
-            cols=max(cols, 1)
-        )
 
-        values = [df.columns.tolist()] + df.fillna("").astype(str).values.tolist()
-        ws.update(values)
+@stage("sync_to_google_sheet")
+def sync_to_google_sheet(mis_sheets, google_sheet_id, keep_worksheet="Invoices", drop_worksheets=()):
+    uploads = {
+        sheet_name[:100]: sheet_values(df)
+        for sheet_name, df in mis_sheets.items()
+        if sheet_name != keep_worksheet
+    }
+    backend_for(google_sheet_id).write(uploads, keep_worksheet, drop_worksheets)
 
 
-def generate_financial_reports(month_name, google_sheet_id=None):
-    mis_sheets = churnout(month_name)
+def _financial_reports(month_name, google_sheet_id, sheet_ids):
+    mis_sheets, df_accrual, schedule = churnout(month_name, sheet_ids, google_sheet_id)
 
     df_invoices = mis_sheets["Invoices"].iloc[2:].copy()
     df_invoices.columns = mis_sheets["Invoices"].iloc[1]
     df_invoices.reset_index(drop=True, inplace=True)
 
-    invoice_nature_map = dict(
-        zip(
-            df_invoices["Invoice Number"].astype(str).str.strip(),
-            df_invoices["Nature"]
-        )
-    )
-
-    df_accrual = mis_sheets["FY 25-26-Accrual"].iloc[2:].copy()
-    df_accrual.columns = mis_sheets["FY 25-26-Accrual"].iloc[1]
-    df_accrual.reset_index(drop=True, inplace=True)
-
     df_accrual["Invoice"] = df_accrual["Invoice"].astype(str).str.strip()
-    df_accrual["Nature"] = df_accrual.apply(
-        lambda r: find_nature(r, invoice_nature_map),
-        axis=1
-    )
+    df_accrual["Nature"] = classify_nature(df_accrual, df_invoices)
 
-    ar_columns = [
-        "Invoiced amount for April",
-        " Invoiced amount for MAY ",
-        "June in months",
-        " July in months ",
-        "Aug Sales in months",
-        "Sept Sales in months"
-    ]
-
-    accrual_columns = [
-        "April Sales (Days Wise)",
-        "May Sales (Days Wise)",
-        "June in days",
-        " July in days ",
-        " Aug Sales in days ",
-        " Sept Sales in days "
-    ]
+    months = fiscal_months(month_name)
+    month_names = [m.strftime("%b-%y") for m in months]
 
-    month_names = ["Apr-25", "May-25", "Jun-25", "Jul-25", "Aug-25", "Sep-25"]
-
-    target_date = datetime.strptime(month_name, "%b-%y")
-    current_date = datetime(2025, 10, 1)
-
-    while current_date <= target_date:
-        m = current_date.strftime("%b")
-        month_names.append(current_date.strftime("%b-%y"))
-        ar_columns.append(f"{m} Sales in months")
-        accrual_columns.append(f"{m} Sales in days")
-        current_date += relativedelta(months=1)
-
-    for col in ar_columns + accrual_columns:
-        if col in df_accrual.columns:
-            df_accrual[col] = df_accrual[col].apply(clean_currency)
-        else:
-            df_accrual[col] = 0.0
-
-    mis_sheets["MR-AR"] = generate_revenue_report(
+    reports = generate_revenue_reports(
         df_accrual,
-        ar_columns,
+        {"MR-AR": schedule.month_wise, "MR Accrual": schedule.day_wise},
         month_names
     )
-
-    mis_sheets["MR Accrual"] = generate_revenue_report(
-        df_accrual,
-        accrual_columns,
-        month_names
-    ).iloc[:-4]
+    mis_sheets["MR-AR"] = reports["MR-AR"]
+    mis_sheets["MR Accrual"] = reports["MR Accrual"].iloc[:-4]
 
     if google_sheet_id:
-        sync_to_google_sheet(mis_sheets, google_sheet_id)
+        sync_to_google_sheet(mis_sheets, google_sheet_id, drop_worksheets=RETIRED_SHEETS)
+
+    return mis_sheets
+
 
-    return mis_sheets
\ No newline at end of file
+@stage("generate_financial_reports")
+def generate_financial_reports(month_name, google_sheet_id=None, sheet_ids=None):
+    if not google_sheet_id:
+        return _financial_reports(month_name, None, sheet_ids)
+    # A run reads the workbook it syncs to, builds its month on it and writes
+    # it back. Runs for the same workbook wait out each other's whole cycle:
+    # serializing only the write let the later sync restore tabs it had read
+    # before the earlier run's month landed.
+    with sync_lock(google_sheet_id):
+        return _financial_reports(month_name, google_sheet_id, sheet_ids)
\ No newline at end of file
@@ -1,46 +1,70 @@
 import re
+from functools import lru_cache
 
 import pandas as pd
+import numpy as np
 
-def normalize_invoice_column(df, col_name="Invoice", default_year="25-26"):
-    def _parse_row(text):
-        if pd.isna(text) or str(text).strip() == "":
-            return ""
-
-        text = str(text).strip()
-
-        text = re.sub(r'\bCN[\s\-]*(?:\d+(?:\s*to\s*\d+)?)', '', text, flags=re.IGNORECASE)
-
-        text = re.sub(r'INV-(\d{2})-(\d{2})-', r'INV~\1~\2~', text)
-        text = re.sub(r'INV-', r'INV~', text)
-        text = re.sub(r"[,_'\-()\[\]/\n\r]", " ", text)
-
-        tokens = text.split()
-        clean_invoices = []
-        current_prefix = f"INV-{default_year}-"
-
-        for token in tokens:
-            token = token.replace("~", "-")
-            if not any(char.isdigit() for char in token):
-                continue
-
-            match_full = re.match(r'INV-(\d{2}-\d{2})-?(\d*)', token)
-            match_short = re.match(r'INV-?(\d+)', token)
-
-            if match_full:
-                year_part = match_full.group(1)
-                current_prefix = f"INV-{year_part}-"
-                number_part = match_full.group(2)
-                if number_part:
-                    clean_invoices.append(f"{current_prefix}{number_part.zfill(6)}")
-            elif match_short:
-                number_part = match_short.group(1)
+CREDIT_NOTE_PATTERN = re.compile(r'\bCN[\s\-]*(?:\d+(?:\s*to\s*\d+)?)', flags=re.IGNORECASE)
+FULL_PREFIX_PATTERN = re.compile(r'INV-(\d{2})-(\d{2})-')
+SHORT_PREFIX_PATTERN = re.compile(r'INV-')
+SEPARATOR_PATTERN = re.compile(r"[,_'\-()\[\]/\n\r]")
+FULL_TOKEN_PATTERN = re.compile(r'INV-(\d{2}-\d{2})-?(\d*)')
+SHORT_TOKEN_PATTERN = re.compile(r'INV-?(\d+)')
+
+@lru_cache(maxsize=65536)
+def parse_invoice_text(text, default_year="25-26"):
+    text = text.strip()
+    if text == "":
+        return ""
+
+    text = CREDIT_NOTE_PATTERN.sub('', text)
+
+    text = FULL_PREFIX_PATTERN.sub(r'INV~\1~\2~', text)
+    text = SHORT_PREFIX_PATTERN.sub(r'INV~', text)
+    text = SEPARATOR_PATTERN.sub(" ", text)
+
+    tokens = text.split()
+    clean_invoices = []
+    current_prefix = f"INV-{default_year}-"
+
+    for token in tokens:
+        token = token.replace("~", "-")
+        if not any(char.isdigit() for char in token):
+            continue
+
+        match_full = FULL_TOKEN_PATTERN.match(token)
+        match_short = SHORT_TOKEN_PATTERN.match(token)
+
+        if match_full:
+            year_part = match_full.group(1)
+            current_prefix = f"INV-{year_part}-"
+            number_part = match_full.group(2)
+            if number_part:
                 clean_invoices.append(f"{current_prefix}{number_part.zfill(6)}")
-            elif token.isdigit():
-                clean_invoices.append(f"{current_prefix}{token.zfill(6)}")
+        elif match_short:
+            number_part = match_short.group(1)
+            clean_invoices.append(f"{current_prefix}{number_part.zfill(6)}")
+        elif token.isdigit():
+            clean_invoices.append(f"{current_prefix}{token.zfill(6)}")
 
-        return ", ".join(clean_invoices)
+    return ", ".join(clean_invoices)
 
+def normalize_invoice_column(df, col_name="Invoice", default_year="25-26"):
     if col_name in df.columns:
-        df[col_name] = df[col_name].apply(_parse_row)
-    return df
\ No newline at end of file
+        codes, uniques = pd.factorize(df[col_name])
+        parsed = [parse_invoice_text(str(text), default_year) for text in uniques]
+        # factorize marks missing values with -1, which picks the trailing "".
+        parsed = np.array(parsed + [""], dtype=object)
+        df[col_name] = pd.Series(parsed[codes], index=df.index, dtype=object)
+    return df
+
+def split_invoice_keys(values, separators=","):
+    pattern = "[" + re.escape(separators) + "]"
+    keys = (
+        values.dropna()
+        .astype(str)
+        .str.split(pattern, regex=True)
+        .explode()
+        .str.strip()
+    )
+    return keys[keys.notna() & (keys != "")]
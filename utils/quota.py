@@ -0,0 +1,135 @@
+import os
+import time
+import random
+import logging
+import threading
+import multiprocessing
+
+import requests
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+# Sheets API per-user quotas; raise them if the project has more.
+READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "6"))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 64.0
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        # Tokens may go negative: each caller reserves its slot and sleeps
+        # until it comes up, so waiting threads are served in order.
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def drain(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+class SharedTokenBucket(TokenBucket):
+    # The same bucket with its state in shared memory, so every worker
+    # process started with it draws on one quota. Pass it to the workers
+    # when they start; it cannot be sent to them afterwards.
+    def __init__(self, per_minute, capacity=None, context=multiprocessing):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self._state = context.Array("d", [self.capacity, time.monotonic()])
+
+    @property
+    def _lock(self):
+        return self._state.get_lock()
+
+    @property
+    def tokens(self):
+        return self._state[0]
+
+    @tokens.setter
+    def tokens(self, value):
+        self._state[0] = value
+
+    @property
+    def updated(self):
+        return self._state[1]
+
+    @updated.setter
+    def updated(self, value):
+        self._state[1] = value
+
+read_bucket = TokenBucket(READS_PER_MINUTE)
+write_bucket = TokenBucket(WRITES_PER_MINUTE)
+
+def share_buckets(reads, writes):
+    global read_bucket, write_bucket
+    read_bucket, write_bucket = reads, writes
+
+def bucket_for(method, endpoint):
+    if "sheets.googleapis.com" not in endpoint:
+        return None
+    return read_bucket if method.upper() == "GET" else write_bucket
+
+def _retryable(error):
+    if error.code in RETRY_STATUSES:
+        return True
+    # Drive reports exhausted quota as 403 rather than 429.
+    reasons = {e.get("reason") for e in error.error.get("errors", [])}
+    return error.code == 403 and bool(reasons & RATE_LIMIT_REASONS)
+
+def backoff_delay(attempt, response=None):
+    delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+class ScheduledHTTPClient(HTTPClient):
+    # Every Sheets call waits for its read or write quota, and 429s, 5xxs and
+    # dropped connections are retried with jittered exponential backoff.
+    def request(self, method, endpoint, *args, **kwargs):
+        bucket = bucket_for(method, endpoint)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return super().request(method, endpoint, *args, **kwargs)
+            except APIError as error:
+                if not _retryable(error) or attempt >= MAX_RETRIES:
+                    raise
+                if error.code == 429 and bucket is not None:
+                    bucket.drain()
+                delay = backoff_delay(attempt, error.response)
+                reason = error.code
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                reason = type(error).__name__
+            logger.warning(
+                "%s %s failed (%s); retry %d/%d in %.1fs",
+                method.upper(), endpoint, reason, attempt + 1, MAX_RETRIES, delay
+            )
+            time.sleep(delay)
+            attempt += 1
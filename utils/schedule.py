@@ -0,0 +1,161 @@
+from calendar import monthrange
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+FISCAL_YEAR_START = datetime(2025, 4, 1)
+
+# Cells holding these read as empty in both amount and date columns.
+NULL_MARKERS = ["", "-", "CN", "#REF!"]
+
+Schedule = namedtuple("Schedule", ["months", "days", "day_wise", "month_wise"])
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+def clean_currency(values):
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float).fillna(0.0)
+    text = s.astype(str).str.strip()
+    empty = s.isna() | text.isin(NULL_MARKERS)
+    text = (
+        text.str.replace(",", "", regex=False)
+        .str.replace('"', "", regex=False)
+        .str.strip()
+    )
+    amounts = pd.to_numeric(text.mask(empty), errors="coerce").astype(float)
+    # What to_numeric rejects goes through float() as single cells always
+    # did: "1_000" is 1000 and "nan" stays NaN; anything else is 0.
+    retry = amounts.isna() & ~empty
+    if retry.any():
+        amounts[retry] = text[retry].map(_to_float).astype(float)
+    return amounts.mask(empty, 0.0)
+
+def parse_date(values):
+    s = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    codes, uniques = pd.factorize(s)
+    uniques = pd.Series(uniques, dtype=object)
+    uniques = uniques.mask(uniques.astype(str).str.strip().isin(NULL_MARKERS))
+    parsed = pd.to_datetime(
+        uniques,
+        dayfirst=True,
+        errors="coerce",
+        format="mixed"
+    )
+    # pandas 2's array parser reads year-first text such as "2025-04-01" as
+    # ISO despite dayfirst; a single cell parses it as 4 Jan, so those few
+    # values are parsed one at a time.
+    year_first = uniques.astype(str).str.match(r"\s*\d{4}[-/.]") & uniques.notna()
+    if year_first.any():
+        parsed[year_first] = [
+            pd.to_datetime(value, dayfirst=True, errors="coerce")
+            for value in uniques[year_first]
+        ]
+    parsed = np.append(parsed.to_numpy("datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(parsed[codes], index=s.index)
+
+def round_currency(values):
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        # np.round scales by 100 before rounding, which can land on the other
+        # side of a .5 tie than Python's round(); defer to round() there.
+        rounded[ties] = [round(v, 2) for v in values[ties].tolist()]
+    return rounded
+
+def get_total_months(start, end):
+    start = np.asarray(start, dtype="datetime64[ns]")
+    stop = np.asarray(end, dtype="datetime64[ns]") + np.timedelta64(1, "D")
+
+    start_month = start.astype("datetime64[M]")
+    months = (stop.astype("datetime64[M]") - start_month).astype(np.int64)
+
+    # Same day-of-month clipping relativedelta applies when it steps
+    # start forward by whole months.
+    landing_month = start_month + months.astype("timedelta64[M]")
+    landing_month_days = (
+        (landing_month + 1).astype("datetime64[D]") - landing_month.astype("datetime64[D]")
+    ).astype(np.int64)
+    start_day = start.astype("datetime64[D]")
+    day_of_month = (start_day - start_month.astype("datetime64[D]")).astype(np.int64)
+    time_of_day = start - start_day.astype("datetime64[ns]")
+
+    landing = (
+        landing_month.astype("datetime64[D]").astype("datetime64[ns]")
+        + np.minimum(day_of_month, landing_month_days - 1).astype("timedelta64[D]")
+        + time_of_day
+    )
+    months = months - (landing > stop)
+
+    return np.maximum(1, months)
+
+def month_range(first, last):
+    months = []
+    cur = datetime(first.year, first.month, 1)
+    while cur <= last:
+        months.append(cur)
+        cur += relativedelta(months=1)
+    return months
+
+def fiscal_months(month_name):
+    return month_range(FISCAL_YEAR_START, datetime.strptime(month_name, "%b-%y"))
+
+def prorate(start, end, amount, months):
+    start = np.asarray(start, dtype="datetime64[ns]")[:, None]
+    end = np.asarray(end, dtype="datetime64[ns]")[:, None]
+    amount = np.asarray(amount, dtype=float)[:, None]
+
+    month_start = np.array(
+        [datetime(m.year, m.month, 1) for m in months],
+        dtype="datetime64[ns]"
+    )[None, :]
+    month_end = np.array(
+        [datetime(m.year, m.month, monthrange(m.year, m.month)[1]) for m in months],
+        dtype="datetime64[ns]"
+    )[None, :]
+
+    valid = ~(np.isnat(start) | np.isnat(end))
+    start = np.where(valid, start, month_start[:, :1])
+    end = np.where(valid, end, month_start[:, :1])
+
+    active_start = np.maximum(start, month_start)
+    active_end = np.minimum(end, month_end)
+    active = valid & (active_start <= active_end)
+
+    one_day = np.timedelta64(1, "D")
+    days_in_month = np.where(active, (active_end - active_start) // one_day + 1, 0)
+
+    total_contract_days = (end - start) // one_day + 1
+    total_contract_months = get_total_months(start, end)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        day_wise = (amount / total_contract_days) * days_in_month
+        month_wise = amount / total_contract_months
+
+    sales_day = np.where(active & (total_contract_days > 0), round_currency(day_wise), 0.0)
+
+    is_closing_month = end.astype("datetime64[M]") == month_start.astype("datetime64[M]")
+
+    sales_month = np.where(active & ~is_closing_month, round_currency(month_wise), 0.0)
+
+    return days_in_month, sales_day, sales_month
+
+def build_schedule(df, months):
+    days, day_wise, month_wise = prorate(
+        parse_date(df["Start Date "]),
+        parse_date(df["End Date"]),
+        clean_currency(df[" Contract Amount "]),
+        months
+    )
+    return Schedule(list(months), days, day_wise, month_wise)
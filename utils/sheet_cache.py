@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+import pandas as pd
+
+CACHE_DIR = os.getenv("MRR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mrr-cache"))
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "sheets")
+MAX_CACHE_BYTES = int(os.getenv("SHEET_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+_lock = threading.Lock()
+
+def _snapshot_key(sheet_id, title, revision):
+    return hashlib.sha1(f"{sheet_id}\0{title}\0{revision}".encode("utf-8")).hexdigest()
+
+def replace_file(path, write):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def load_titles(sheet_id, revision):
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_key(sheet_id, "", revision) + ".json")
+    try:
+        with open(path) as f:
+            titles = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _touch(path)
+    return titles
+
+def save_titles(sheet_id, revision, titles):
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_key(sheet_id, "", revision) + ".json")
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(titles, f)
+
+    replace_file(path, write)
+
+def read_grid(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        grid = pd.read_parquet(path)
+    except Exception:
+        return None
+    return grid.values.tolist()
+
+def write_grid(path, values):
+    width = max((len(row) for row in values), default=0)
+    grid = pd.DataFrame(
+        [row + [""] * (width - len(row)) for row in values],
+        columns=[str(i) for i in range(width)],
+        dtype=object
+    )
+    replace_file(path, lambda tmp_path: grid.to_parquet(tmp_path, index=False))
+
+def load_values(sheet_id, title, revision):
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_key(sheet_id, title, revision) + ".parquet")
+    values = read_grid(path)
+    if values is not None:
+        _touch(path)
+    return values
+
+def save_values(sheet_id, title, revision, values):
+    path = os.path.join(SNAPSHOT_DIR, _snapshot_key(sheet_id, title, revision) + ".parquet")
+    write_grid(path, values)
+
+def evict():
+    with _lock:
+        try:
+            entries = [
+                entry for entry in os.scandir(SNAPSHOT_DIR)
+                if entry.is_file() and not entry.name.endswith(".tmp")
+            ]
+        except FileNotFoundError:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries:
+            if total <= MAX_CACHE_BYTES:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                continue
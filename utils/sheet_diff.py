@@ -0,0 +1,69 @@
+import numpy as np
+from gspread.utils import absolute_range_name, fill_gaps, rowcol_to_a1
+
+def sheet_values(df):
+    return [[str(c) for c in df.columns]] + df.fillna("").astype(str).values.tolist()
+
+def _grid(values, rows, cols):
+    grid = np.full((rows, cols), "", dtype=object)
+    for r, row in enumerate(values):
+        if row:
+            grid[r, :len(row)] = row
+    return grid
+
+def changed_ranges(title, old_values, new_values):
+    rows = max(len(old_values), len(new_values))
+    cols = max([len(row) for row in old_values] + [len(row) for row in new_values] + [0])
+    if rows == 0 or cols == 0:
+        return []
+
+    old_grid = _grid(old_values, rows, cols)
+    new_grid = _grid(new_values, rows, cols)
+    changed = old_grid != new_grid
+
+    # Runs of changed cells that span the same columns on consecutive rows
+    # are merged into one rectangle, so appended rows or a new month column
+    # become a single range.
+    blocks = []
+    open_blocks = {}
+    for r in np.flatnonzero(changed.any(axis=1)):
+        changed_cols = np.flatnonzero(changed[r])
+        splits = np.flatnonzero(np.diff(changed_cols) > 1) + 1
+        row_runs = set()
+        for run in np.split(changed_cols, splits):
+            span = (int(run[0]), int(run[-1]))
+            row_runs.add(span)
+            block = open_blocks.get(span)
+            if block is not None and block[1] == r - 1:
+                block[1] = r
+            else:
+                if block is not None:
+                    blocks.append((block[0], block[1], span))
+                open_blocks[span] = [r, r]
+        for span in list(open_blocks):
+            if span not in row_runs and open_blocks[span][1] < r:
+                r0, r1 = open_blocks.pop(span)
+                blocks.append((r0, r1, span))
+    for span, (r0, r1) in open_blocks.items():
+        blocks.append((r0, r1, span))
+
+    data = []
+    for r0, r1, (c0, c1) in blocks:
+        a1 = f"{rowcol_to_a1(r0 + 1, c0 + 1)}:{rowcol_to_a1(r1 + 1, c1 + 1)}"
+        data.append({
+            "range": absolute_range_name(title, a1),
+            "values": new_grid[r0:r1 + 1, c0:c1 + 1].tolist()
+        })
+    return data
+
+def read_values(http_client, sheet_id, titles):
+    if not titles:
+        return {}
+    response = http_client.values_batch_get(
+        sheet_id,
+        [absolute_range_name(title) for title in titles]
+    )
+    return {
+        title: fill_gaps(value_range["values"]) if value_range.get("values") else []
+        for title, value_range in zip(titles, response.get("valueRanges", []))
+    }
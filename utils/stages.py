@@ -0,0 +1,45 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+_listeners = ContextVar("stage_listeners", default=())
+
+@contextmanager
+def observe_stages(listener):
+    token = _listeners.set(_listeners.get() + (listener,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+def _notify(name, status, details=None):
+    for listener in _listeners.get():
+        listener(name, status, details)
+
+def record_call(service, sent=0, received=0):
+    _notify(service, "call", {"sent": sent, "received": received})
+
+def carry_context(fn):
+    # Pool threads start with an empty context; run fn in a copy of the
+    # submitting thread's so listeners still see what happens there.
+    context = copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+def stage(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            _notify(name, "start", {"args": args, "kwargs": kwargs})
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                _notify(name, "error")
+                raise
+            _notify(name, "done", {"result": result})
+            return result
+        return wrapper
+    return decorator
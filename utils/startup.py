@@ -0,0 +1,34 @@
+import os
+import json
+import time
+
+_rendered_once = False
+
+def process_uptime():
+    # Seconds since this process was exec'd, so the first render also counts
+    # interpreter and Streamlit boot time on a cold machine.
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def record_render(script_started):
+    global _rendered_once
+
+    entry = {
+        "event": "page_render",
+        "cold": not _rendered_once,
+        "script_ms": round((time.perf_counter() - script_started) * 1000, 1)
+    }
+    if not _rendered_once:
+        uptime = process_uptime()
+        if uptime is not None:
+            entry["process_uptime_ms"] = round(uptime * 1000, 1)
+
+    _rendered_once = True
+    print(json.dumps(entry), flush=True)
+    return entry